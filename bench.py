@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the scenes and helpers of ingi2355_exam_video.py.
+
+    python bench.py clone --n-cpus 3 32 128 --scenes SchedulerWaitFree TicketScheduler
+    python bench.py scenes -q l m --baseline media/bench/baseline.json
+    python bench.py queue --slots 5 256 1024
+    python bench.py counter --frames 15 60 600 --target 1000
+"""
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from copy import deepcopy
+
+from manim import *
+from manim import __version__ as manim_version
+
+from ingi2355_exam_video import (
+    DelegatinQueue,
+    GlyphInteger,
+    add_eyes_on_cpu,
+    clone,
+    get_cpu_mobj,
+)
+from render import MODULE_NAME, QUALITY_FLAGS, get_render_config, get_scenes
+from video_renderer import VideoRenderer
+
+BENCH_DIR = os.path.join(config.media_dir, "bench")
+
+# Metrics compared against the baseline, lower is better
+REGRESSION_METRICS = ("wall_time", "construct_time", "peak_rss_mib")
+
+
+class BenchmarkRenderer(VideoRenderer):
+    """VideoRenderer that accounts the time spent interpolating the
+    animations, rasterizing and encoding frames, and the largest scene it
+    rendered."""
+
+    def __init__(self, **kwargs):
+        VideoRenderer.__init__(self, **kwargs)
+        self.timings = {"interpolation": 0.0, "rasterization": 0.0, "encoding": 0.0}
+        self.num_frames = 0
+        self.max_mobjects = 0
+        self.max_points = 0
+        self.update_frame = self.timed("rasterization", self.update_frame)
+        # The static layers are rasterized and composited outside update_frame
+        for name in ("rasterize_background", "rasterize_overlay", "composite_overlay"):
+            setattr(self, name, self.timed("rasterization", getattr(self, name)))
+        self.add_frame = self.timed("encoding", self.add_frame)
+        self.scene_finished = self.timed("encoding", self.scene_finished)
+
+    def init_scene(self, scene):
+        VideoRenderer.init_scene(self, scene)
+        self.file_writer.end_animation = self.timed(
+            "encoding", self.file_writer.end_animation
+        )
+
+    def timed(self, key, function):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.timings[key] += time.perf_counter() - start
+
+        return wrapper
+
+    def play(self, scene, *args, **kwargs):
+        # Instance attribute for the duration of the play only, as in profiler.py
+        scene.update_to_time = self.timed("interpolation", scene.update_to_time)
+        try:
+            VideoRenderer.play(self, scene, *args, **kwargs)
+        finally:
+            del scene.update_to_time
+        self.num_frames = int(round(self.time * config["frame_rate"]))
+        family = scene.get_mobject_family_members()
+        self.max_mobjects = max(self.max_mobjects, len(family))
+        self.max_points = max(self.max_points, sum(len(mobj.points) for mobj in family))
+
+
+def build_columns(n_cpus, copy_function):
+    """Mimics the per-CPU layout of SchedulerWaitFree and TicketScheduler."""
+    cpu_mobj = get_cpu_mobj(0.4)
+    queue_mobj = Rectangle(width=0.5, height=1.5).set_fill(BLUE, opacity=0.5)
+    v_line = Line(config.top, config.bottom)
+
+    columns = VGroup()
+    for cpu_idx in range(n_cpus):
+        curr_cpu_mobj = copy_function(cpu_mobj).shift(cpu_idx * RIGHT)
+        curr_queue_mobj = copy_function(queue_mobj).next_to(curr_cpu_mobj, DOWN)
+        curr_v_line = copy_function(v_line).shift(cpu_idx * RIGHT)
+        columns.add(VGroup(curr_cpu_mobj, curr_queue_mobj, curr_v_line))
+    return columns
+
+
+def measure(function, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, peak
+
+
+def bench_clone(args):
+    # Warm the SVG registry so that parsing is not part of the measure
+    add_eyes_on_cpu(get_cpu_mobj(0.4), which="down")
+
+    print(f"{'N_CPUS':>8} {'copy':>10} {'time (ms)':>12} {'peak (KiB)':>12}")
+    for n_cpus in args.n_cpus:
+        for name, copy_function in (("deepcopy", deepcopy), ("clone", clone)):
+            elapsed, peak = measure(build_columns, n_cpus, copy_function)
+            print(f"{n_cpus:>8} {name:>10} {1e3 * elapsed:>12.2f} {peak / 1024:>12.1f}")
+
+    if not args.scenes:
+        return
+    render_config = get_render_config(QUALITY_FLAGS["l"])
+    render_config.update(write_to_movie=False, disable_caching=True)
+    print(f"{'scene':>20} {'copy':>10} {'construct (s)':>14}")
+    for scene_name in args.scenes:
+        for copy_name in ("deepcopy", "clone"):
+            # A fresh process per run, so that both start from the same caches
+            with multiprocessing.Pool(1, maxtasksperchild=1) as pool:
+                elapsed = pool.apply(
+                    construct_scene, (scene_name, render_config, copy_name)
+                )
+            print(f"{scene_name:>20} {copy_name:>10} {elapsed:>14.2f}")
+
+
+def construct_scene(scene_name, render_config, copy_name):
+    """Time of the construct of ``scene_name``, every play being skipped, with
+    the clones of the module made by ``copy_name`` (deepcopy or clone). The
+    scene is constructed a first time to warm the text and SVG caches."""
+    module = importlib.import_module(MODULE_NAME)
+    if copy_name == "deepcopy":
+        module.clone = deepcopy
+    with tempconfig(render_config):
+        for _ in range(2):
+            renderer = VideoRenderer(skip_animations=True)
+            scene = getattr(module, scene_name)(renderer=renderer)
+            start = time.perf_counter()
+            scene.render()
+            elapsed = time.perf_counter() - start
+    return elapsed
+
+
+def bench_queue(args):
+    # Warm the glyph cache so that LaTeX is not part of the measure
+    DelegatinQueue(2, 1)
+
+    print(f"{'slots':>8} {'build (ms)':>12} {'update (ms)':>12} {'peak (KiB)':>12}")
+    for slots in args.slots:
+        elapsed, peak = measure(DelegatinQueue, slots, 10)
+        queue = DelegatinQueue(slots, 10)
+        start = time.perf_counter()
+        queue.set_values({("request", idx): idx % 10 for idx in range(slots)})
+        update = time.perf_counter() - start
+        print(
+            f"{slots:>8} {1e3 * elapsed:>12.2f} {1e3 * update:>12.2f} "
+            f"{peak / 1024:>12.1f}"
+        )
+
+
+def interpolate_counter(value, target, frames):
+    animation = ChangeDecimalToValue(value, target)
+    animation.begin()
+    for alpha in np.linspace(0, 1, frames):
+        animation.interpolate(alpha)
+    animation.finish()
+
+
+def bench_counter(args):
+    # Warm the glyph cache so that LaTeX is not part of the measure
+    GlyphInteger(1234567890)
+
+    print(f"{'frames':>8} {'value':>14} {'time (ms)':>12} {'peak (KiB)':>12}")
+    for frames in args.frames:
+        for name, value_cls in (("Integer", Integer), ("GlyphInteger", GlyphInteger)):
+            elapsed, peak = measure(
+                interpolate_counter, value_cls(0), args.target, frames
+            )
+            print(f"{frames:>8} {name:>14} {1e3 * elapsed:>12.2f} {peak / 1024:>12.1f}")
+
+
+def bench_scene(scene_name, render_config):
+    module = importlib.import_module(MODULE_NAME)
+    with tempconfig(render_config):
+        renderer = BenchmarkRenderer()
+        scene = getattr(module, scene_name)(renderer=renderer)
+        start = time.perf_counter()
+        scene.render()
+        wall_time = time.perf_counter() - start
+
+    interpolation_time = renderer.timings["interpolation"]
+    rasterization_time = renderer.timings["rasterization"]
+    encoding_time = renderer.timings["encoding"]
+    return {
+        "wall_time": wall_time,
+        "construct_time": wall_time
+        - interpolation_time
+        - rasterization_time
+        - encoding_time,
+        "interpolation_time": interpolation_time,
+        "rasterization_time": rasterization_time,
+        "encoding_time": encoding_time,
+        "frames": renderer.num_frames,
+        "fps": renderer.num_frames / wall_time,
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "max_mobjects": renderer.max_mobjects,
+        "max_points": renderer.max_points,
+    }
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """Lines describing the metrics of ``results`` that are more than
+    ``threshold`` (relative) above ``baseline``."""
+    regressions = []
+    for quality, scenes in results.items():
+        for scene_name, metrics in scenes.items():
+            reference = baseline.get(quality, {}).get(scene_name)
+            if reference is None:
+                continue
+            for metric in REGRESSION_METRICS:
+                if metrics[metric] > (1 + threshold) * reference[metric]:
+                    regressions.append(
+                        f"{scene_name} ({quality}) {metric}: "
+                        f"{reference[metric]:.2f} -> {metrics[metric]:.2f}"
+                    )
+    return regressions
+
+
+def bench_scenes(args):
+    module = importlib.import_module(MODULE_NAME)
+    scene_names = args.scenes or [cls.__name__ for cls in get_scenes(module)]
+
+    results = {}
+    for flag in args.quality:
+        quality = QUALITY_FLAGS[flag]
+        render_config = get_render_config(quality)
+        render_config.update(disable_caching=True)
+        results[quality] = {}
+        for scene_name in scene_names:
+            # A fresh process per scene, so that the peak RSS is the scene's own
+            with multiprocessing.Pool(1, maxtasksperchild=1) as pool:
+                metrics = pool.apply(bench_scene, (scene_name, render_config))
+            results[quality][scene_name] = metrics
+            print(
+                f"{scene_name:>20} {flag} "
+                f"{metrics['wall_time']:>8.2f}s "
+                f"(construct {metrics['construct_time']:.2f}s, "
+                f"interpolation {metrics['interpolation_time']:.2f}s, "
+                f"raster {metrics['rasterization_time']:.2f}s, "
+                f"encoding {metrics['encoding_time']:.2f}s) "
+                f"{metrics['fps']:>7.1f} fps {metrics['peak_rss_mib']:>7.1f} MiB"
+            )
+
+    report = {"manim_version": manim_version, "results": results}
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as fp:
+        json.dump(report, fp, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as fp:
+            json.dump(report, fp, indent=2)
+        return
+
+    try:
+        with open(args.baseline) as fp:
+            baseline = json.load(fp)["results"]
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}, use --save-baseline to store one")
+        return
+
+    regressions = compare_to_baseline(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    clone_parser = subparsers.add_parser(
+        "clone", help="Compare deepcopy and clone on the per-CPU scene layout"
+    )
+    clone_parser.add_argument("--n-cpus", type=int, nargs="+", default=[3, 32, 128])
+    clone_parser.add_argument(
+        "--scenes",
+        nargs="+",
+        default=[],
+        help="Scenes whose construct is timed with deepcopy and clone",
+    )
+    clone_parser.set_defaults(func=bench_clone)
+
+    queue_parser = subparsers.add_parser(
+        "queue", help="Build and update delegation queues of increasing size"
+    )
+    queue_parser.add_argument("--slots", type=int, nargs="+", default=[5, 256, 1024])
+    queue_parser.set_defaults(func=bench_queue)
+
+    counter_parser = subparsers.add_parser(
+        "counter", help="Animate a counter with Integer and GlyphInteger"
+    )
+    counter_parser.add_argument("--frames", type=int, nargs="+", default=[15, 60, 600])
+    counter_parser.add_argument("--target", type=int, default=1000)
+    counter_parser.set_defaults(func=bench_counter)
+
+    scenes_parser = subparsers.add_parser(
+        "scenes", help="Render the scenes and compare them against a baseline"
+    )
+    scenes_parser.add_argument(
+        "scenes", nargs="*", help="Scenes to render (all the scenes by default)"
+    )
+    scenes_parser.add_argument(
+        "-q",
+        "--quality",
+        nargs="+",
+        choices=QUALITY_FLAGS,
+        default=["l"],
+        help="Quality presets, as for manim -q (default: l)",
+    )
+    scenes_parser.add_argument(
+        "-o", "--output", default=os.path.join(BENCH_DIR, "results.json")
+    )
+    scenes_parser.add_argument(
+        "--baseline", default=os.path.join(BENCH_DIR, "baseline.json")
+    )
+    scenes_parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store the results as the new baseline",
+    )
+    scenes_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative increase reported as a regression (default: 0.1)",
+    )
+    scenes_parser.set_defaults(func=bench_scenes)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
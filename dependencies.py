@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Source-level dependencies of the scenes of ingi2355_exam_video.py.
+
+The caches of render.py and video_renderer.py are keyed by the sources of
+the code a scene (or a section of a scene) reaches, found by walking the
+names of the sources with ast, and by the SVG files these sources load.
+"""
+
+import ast
+import inspect
+import os
+import sys
+import textwrap
+
+
+def is_local_module(module, name):
+    """Whether ``name`` is a module next to ``module``, rather than a library."""
+    directory = os.path.dirname(inspect.getfile(module))
+    return name is not None and os.path.exists(os.path.join(directory, f"{name}.py"))
+
+
+def get_module_level_names(module):
+    """Names of the functions, classes and variables defined by ``module``
+    itself, or imported from the modules next to it."""
+    names = set()
+    for node in ast.parse(inspect.getsource(module)).body:
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.Assign):
+            names.update(t.id for t in node.targets if isinstance(t, ast.Name))
+        elif isinstance(node, ast.ImportFrom) and is_local_module(module, node.module):
+            names.update(alias.asname or alias.name for alias in node.names)
+    return names
+
+
+def get_module_assignments(module):
+    """Source of the module-level assignment of each variable of ``module``."""
+    source = inspect.getsource(module)
+    return {
+        target.id: ast.get_source_segment(source, node)
+        for node in ast.parse(source).body
+        if isinstance(node, ast.Assign)
+        for target in node.targets
+        if isinstance(target, ast.Name)
+    }
+
+
+def get_dependencies(module, *objs, cls=None):
+    """Sources of ``objs`` and of the module-level functions, classes and
+    constants they reach through their call graph. If ``cls`` is given, the
+    methods and class attributes of ``cls`` used through ``self`` are followed
+    as well."""
+    module_names = get_module_level_names(module)
+    assignments = get_module_assignments(module)
+    dependencies = {}
+    to_visit = [(obj.__qualname__, obj) for obj in objs]
+    while to_visit:
+        name, value = to_visit.pop()
+        if name in dependencies:
+            continue
+        if not (inspect.isfunction(value) or inspect.isclass(value)):
+            if isinstance(value, (dict, list, set)) and name in assignments:
+                # Caches filled while rendering, only their definition matters
+                dependencies[name] = assignments[name]
+            else:
+                dependencies[name] = f"{name} = {value!r}"
+            continue
+        if value.__module__ != module.__name__:
+            # Imported from a module next to ``module``, that is followed whole
+            dependencies[value.__module__] = inspect.getsource(
+                sys.modules[value.__module__]
+            )
+            continue
+
+        source = inspect.getsource(value)
+        dependencies[name] = source
+        for node in ast.walk(ast.parse(textwrap.dedent(source))):
+            if isinstance(node, ast.Name) and node.id in module_names:
+                to_visit.append((node.id, getattr(module, node.id)))
+            elif (
+                cls is not None
+                and isinstance(node, ast.Attribute)
+                and isinstance(node.value, ast.Name)
+                and node.value.id == "self"
+            ):
+                attr = getattr(cls, node.attr, None)
+                if inspect.isfunction(attr):
+                    if attr.__module__ == module.__name__:
+                        to_visit.append((attr.__qualname__, attr))
+                elif node.attr in vars(cls):
+                    to_visit.append((f"{cls.__name__}.{node.attr}", attr))
+    return dependencies
+
+
+def get_svg_dependencies(module, sources):
+    """SVG files named by a string constant of ``sources``, either as
+    ``get_svg_mobj("cpu")`` or as a directory prefix like ``f"eyes/{which}"``."""
+    constants = {
+        node.value
+        for source in sources
+        for node in ast.walk(ast.parse(textwrap.dedent(source)))
+        if isinstance(node, ast.Constant) and isinstance(node.value, str)
+    }
+    svg_files = []
+    for root, _, files in os.walk(module.SVG_DIR):
+        for file_name in files:
+            path = os.path.join(root, file_name)
+            name = os.path.splitext(os.path.relpath(path, module.SVG_DIR))[0]
+            if any(
+                name == constant
+                or (constant.endswith("/") and name.startswith(constant))
+                for constant in constants
+            ):
+                svg_files.append(path)
+    return sorted(svg_files)
+
+
+def update_digest(digest, module, dependencies):
+    """Feeds the sources of ``dependencies`` and the SVG files they load to ``digest``."""
+    for name in sorted(dependencies):
+        digest.update(dependencies[name].encode())
+    for path in get_svg_dependencies(module, dependencies.values()):
+        with open(path, "rb") as svg_file:
+            digest.update(path.encode())
+            digest.update(svg_file.read())
+    return digest
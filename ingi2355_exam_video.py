@@ -6,18 +6,415 @@
 @last modified : 2021 May 21, 17:53:45
 """
 
+import copy
+import hashlib
+import inspect
+import io
+import json
+import os
+import pickle
+
+import manimpango
 from manim import *
+from manim import __version__ as manim_version
 import numpy as np
-from copy import deepcopy
+
+from simulation import QUEUE_ROWS, get_trace_changes, simulate_asm, simulate_lock
+
+SVG_DIR = "ressources/svg"
+SVG_CACHE_DIR = os.path.join(config.media_dir, "cache", "svg")
+FIT_CACHE_DIR = os.path.join(config.media_dir, "cache", "fits")
+ASM_CACHE_DIR = os.path.join(config.media_dir, "cache", "asm")
+TEXT_CACHE_DIR = os.path.join(config.media_dir, "cache", "text")
+
+# Parsed SVG templates, keyed by (file, scale, color, opacity)
+SVG_TEMPLATES = {}
+# Text and Tex templates, keyed by get_text_cache_key
+TEXT_TEMPLATES = {}
+# Where get_cached_text found the templates it was asked for
+TEXT_CACHE_STATS = {"memory": 0, "disk": 0, "miss": 0}
+# LaTeX glyphs of the characters of GlyphInteger, keyed by character
+DIGIT_GLYPHS = {}
+# Above this number of CPUs, the scheduler scenes show bins of CPUs
+MAX_CPU_COLUMNS = 8
+
+
+class CachedSVGMobject(SVGMobject):
+    """SVGMobject whose parsed paths are stored on disk, keyed by the file hash."""
+
+    def generate_points(self):
+        cache_path = self.get_cache_path()
+        if os.path.exists(cache_path):
+            with np.load(cache_path) as cached:
+                styles = json.loads(str(cached["styles"]))
+                for idx, style in enumerate(styles):
+                    path_mobj = VMobject(**style)
+                    path_mobj.points = cached[f"points_{idx}"]
+                    self.add(path_mobj)
+            return
+
+        SVGMobject.generate_points(self)
+
+        styles = [
+            {
+                "fill_color": mobj.fill_color and str(mobj.fill_color),
+                "fill_opacity": mobj.fill_opacity,
+                "stroke_color": mobj.stroke_color and str(mobj.stroke_color),
+                "stroke_opacity": mobj.stroke_opacity,
+                "stroke_width": mobj.stroke_width,
+            }
+            for mobj in self.submobjects
+        ]
+        points = {
+            f"points_{idx}": mobj.points for idx, mobj in enumerate(self.submobjects)
+        }
+        data = io.BytesIO()
+        np.savez(data, styles=json.dumps(styles), **points)
+        write_cache_file(cache_path, data.getvalue())
+
+    def get_cache_path(self):
+        with open(self.file_path, "rb") as svg_file:
+            digest = hashlib.sha1(svg_file.read())
+        digest.update(manim_version.encode())
+        return os.path.join(SVG_CACHE_DIR, f"{digest.hexdigest()}.npz")
+
+
+def clone(mobj):
+    """Copy a mobject tree without going through copy.deepcopy.
+
+    Styles, colors, SVG definitions and any other attribute that manim only
+    ever reassigns are shared with the original. Numpy arrays (points and
+    rgbas) are updated in place by shift/scale/set_fill, so they get a flat
+    copy, and references to mobjects of the tree are remapped to their clones,
+    as are the groups of mobjects of the tree kept as attributes (Text.chars).
+    Other mobjects (a ``target`` or a ``saved_state``) are deep copied, as by
+    Mobject.copy, so that moving them never moves the original.
+    """
+    clones = {}
+
+    def clone_family(mobj):
+        result = mobj.__class__.__new__(mobj.__class__)
+        result.__dict__.update(mobj.__dict__)
+        result.original_id = str(id(mobj))
+        clones[id(mobj)] = result
+        result.submobjects = [clone_family(sub) for sub in mobj.submobjects]
+        return result
+
+    def remap(value):
+        if isinstance(value, np.ndarray):
+            return value.copy()
+        if isinstance(value, Mobject):
+            if id(value) in clones:
+                return clones[id(value)]
+            if value.submobjects and all(
+                id(sub) in clones for sub in value.submobjects
+            ):
+                group = value.__class__.__new__(value.__class__)
+                group.__dict__.update(value.__dict__)
+                # Its own arrays and containers (updaters, ...), as in the tree
+                for key, elem in value.__dict__.items():
+                    if isinstance(elem, (np.ndarray, list, dict)):
+                        group.__dict__[key] = elem.copy()
+                group.submobjects = [clones[id(sub)] for sub in value.submobjects]
+                return group
+            return copy.deepcopy(value)
+        if isinstance(value, list):
+            return [remap(elem) for elem in value]
+        if isinstance(value, dict):
+            return {key: remap(elem) for key, elem in value.items()}
+        return value
+
+    result = clone_family(mobj)
+    for mobj_clone in clones.values():
+        for key, value in mobj_clone.__dict__.items():
+            mobj_clone.__dict__[key] = remap(value)
+    return result
+
+
+def get_svg_mobj(name, scale=None, color=None, opacity=1):
+    key = (name, scale, color, opacity)
+    if key not in SVG_TEMPLATES:
+        template = CachedSVGMobject(os.path.join(SVG_DIR, f"{name}.svg"))
+        if color:
+            template.set_fill(color, opacity=opacity)
+        if scale:
+            template.scale(scale)
+        SVG_TEMPLATES[key] = template
+    return clone(SVG_TEMPLATES[key])
+
+
+def get_text_cache_key(cls, args, kwargs):
+    """Key of the ``cls`` mobject built from ``args`` and ``kwargs``, with the
+    versions of manim and Pango and the TeX template it is built with."""
+    tex_template = kwargs.get("tex_template") or config["tex_template"]
+    settings = (
+        manim_version,
+        getattr(manimpango, "__version__", None),
+        tex_template.tex_compiler,
+        tex_template.output_format,
+        tex_template.body,
+    )
+    kwargs = {key: value for key, value in kwargs.items() if key != "tex_template"}
+    return repr((cls.__name__, args, sorted(kwargs.items()), settings))
+
+
+def write_cache_file(path, data):
+    """Writes ``data`` to ``path`` through a file of this process moved in
+    place, so that the scenes rendered in parallel never read a partial file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    part_path = f"{path}.{os.getpid()}.part"
+    with open(part_path, "wb") as fp:
+        fp.write(data)
+    os.replace(part_path, path)
+
+
+def get_cached_text(cls, *args, **kwargs):
+    """Clone of the ``cls`` (Text, Tex, ...) mobject built from ``args`` and
+    ``kwargs``. The templates are kept in memory and pickled on disk, keyed by
+    the text and all its settings (font, size, style, color), so that neither
+    Pango nor LaTeX run again for a text that was already built once."""
+    key = get_text_cache_key(cls, args, kwargs)
+    if key in TEXT_TEMPLATES:
+        TEXT_CACHE_STATS["memory"] += 1
+    else:
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        cache_path = os.path.join(TEXT_CACHE_DIR, f"{digest}.pickle")
+        if os.path.exists(cache_path):
+            TEXT_CACHE_STATS["disk"] += 1
+            with open(cache_path, "rb") as fp:
+                TEXT_TEMPLATES[key] = pickle.load(fp)
+        else:
+            TEXT_CACHE_STATS["miss"] += 1
+            TEXT_TEMPLATES[key] = cls(*args, **kwargs)
+            try:
+                data = pickle.dumps(TEXT_TEMPLATES[key])
+            except (pickle.PicklingError, AttributeError, TypeError) as e:
+                logger.debug(f"{cls.__name__} {args} not cached on disk: {e}")
+            else:
+                write_cache_file(cache_path, data)
+
+    return clone(TEXT_TEMPLATES[key])
+
+
+def get_text(*args, **kwargs):
+    return get_cached_text(Text, *args, **kwargs)
+
+
+def get_tex(*args, **kwargs):
+    return get_cached_text(Tex, *args, **kwargs)
+
+
+def get_code(code, **kwargs):
+    """Highlighted Code mobject of ``code``, cached by its source and settings
+    (language, style, font, ...) as the texts of get_cached_text."""
+    return get_cached_text(Code, code=code, **kwargs)
+
+
+class CodeListing:
+    """Source listing of which only a window of ``visible_lines`` lines is
+    built at a time, so that long programs cost no more than their visible
+    part. Each window is highlighted on its own and cached by get_code."""
+
+    def __init__(self, source, visible_lines=40, **kwargs):
+        self.lines = source.split("\n")
+        self.visible_lines = visible_lines
+        self.kwargs = kwargs
+
+    def get_window(self, first_line=0):
+        """Code of the lines shown when the line ``first_line`` (from 0) is at
+        the top, numbered as in the whole listing."""
+        first_line = max(0, min(first_line, len(self.lines) - self.visible_lines))
+        window = self.lines[first_line : first_line + self.visible_lines]
+        return get_code("\n".join(window), line_no_from=first_line + 1, **self.kwargs)
+
+    def __len__(self):
+        return len(self.lines)
+
+
+def log_text_cache_stats():
+    lookups = sum(TEXT_CACHE_STATS.values())
+    if not lookups:
+        return
+    logger.info(
+        f"Text cache : {lookups} lookups, "
+        f"{TEXT_CACHE_STATS['memory'] / lookups:.1%} in memory, "
+        f"{TEXT_CACHE_STATS['disk'] / lookups:.1%} on disk, "
+        f"{TEXT_CACHE_STATS['miss']} built"
+    )
+
+
+def fit_exponential(data, x_origin=0):
+    """Coefficients (a, b) of a * exp(b * (x - x_origin)) fitted on the
+    {x: y} items of ``data`` by a linear fit of log(y), cached on disk by a
+    hash of ``data``."""
+    key = json.dumps([x_origin, sorted(data.items())])
+    cache_path = os.path.join(
+        FIT_CACHE_DIR, f"{hashlib.sha1(key.encode()).hexdigest()}.json"
+    )
+    if os.path.exists(cache_path):
+        with open(cache_path) as fp:
+            return tuple(json.load(fp))
+
+    X = np.array(list(data.keys()), dtype=float)
+    y = np.array(list(data.values()), dtype=float)
+    b, log_a = np.polyfit(X - x_origin, np.log(y), 1)
+    coefficients = (float(np.exp(log_a)), float(b))
+
+    write_cache_file(cache_path, json.dumps(coefficients).encode())
+    return coefficients
+
+
+def get_asm_occupancy(n_accesses, steps):
+    """Occupancy of the states of simulate_asm, cached on disk by its
+    arguments and the source of the simulation."""
+    key = json.dumps(
+        [n_accesses, steps, inspect.getsource(inspect.getmodule(simulate_asm))]
+    )
+    cache_path = os.path.join(
+        ASM_CACHE_DIR, f"{hashlib.sha1(key.encode()).hexdigest()}.npy"
+    )
+    if os.path.exists(cache_path):
+        return np.load(cache_path)
+
+    occupancy = simulate_asm(n_accesses, steps)["occupancy"]
+    data = io.BytesIO()
+    np.save(data, occupancy)
+    write_cache_file(cache_path, data.getvalue())
+    return occupancy
+
+
+def get_scatter_dots(points, color=WHITE, radius=DEFAULT_DOT_RADIUS):
+    """One Dot per row of ``points``, cloned from a single template."""
+    template = Dot(radius=radius, color=color)
+    dots = []
+    for point in points:
+        dot = clone(template)
+        dot.points = template.points + point
+        dots.append(dot)
+    return VGroup(*dots)
+
+
+def get_segments(starts, ends):
+    """One Line per row, from the row of ``starts`` to the same row of
+    ``ends``, cloned from a single template with their points computed at
+    once. Each line stays a submobject of its own, so that Create and
+    Uncreate time them as they did the separate Lines."""
+    alphas = np.linspace(0, 1, 4)[:, None]
+    points = starts[:, None, :] + alphas * (ends - starts)[:, None, :]
+    template = Line()
+    segments = []
+    for segment_points in points:
+        segment = clone(template)
+        segment.points = segment_points
+        segments.append(segment)
+    return VGroup(*segments)
+
+
+def get_glyph(char):
+    if char not in DIGIT_GLYPHS:
+        DIGIT_GLYPHS[char] = get_cached_text(SingleStringMathTex, char)
+    return clone(DIGIT_GLYPHS[char])
+
+
+class GlyphInteger(Integer):
+    """Integer whose characters are cloned from DIGIT_GLYPHS instead of being
+    compiled by LaTeX and parsed again for each value it takes."""
+
+    def __init__(self, number=0, digit_to_digit_buff=0.05, edge_to_fix=LEFT, **kwargs):
+        VMobject.__init__(self, **kwargs)
+        self.number = number
+        self.num_decimal_places = 0
+        self.include_sign = False
+        self.group_with_commas = True
+        self.digit_to_digit_buff = digit_to_digit_buff
+        self.show_ellipsis = False
+        self.unit = None
+        self.include_background_rectangle = False
+        self.edge_to_fix = edge_to_fix
+        self.initial_config = dict(
+            kwargs, digit_to_digit_buff=digit_to_digit_buff, edge_to_fix=edge_to_fix
+        )
+        self.add(*self.get_glyphs(number))
+        if "color" in kwargs:
+            self.set_color(kwargs["color"])
+
+    def get_glyphs(self, number):
+        """Glyphs of ``number``, laid out as by DecimalNumber."""
+        num_string = f"{int(np.round(number)):,}"
+        glyphs = VGroup(*map(get_glyph, num_string))
+        glyphs.arrange(buff=self.digit_to_digit_buff, aligned_edge=DOWN)
+        for idx, char in enumerate(num_string):
+            if char == "-" and len(num_string) > idx + 1:
+                glyphs[idx].align_to(glyphs[idx + 1], UP)
+                glyphs[idx].shift(glyphs[idx + 1].height * DOWN / 2)
+            elif char == ",":
+                glyphs[idx].shift(glyphs[idx].height * DOWN / 2)
+        return glyphs
+
+    def set_value(self, number):
+        if np.round(number) == np.round(self.number):
+            # Same glyphs, as when an animation changes the value by less than 1
+            self.number = number
+            return self
+        glyphs = self.get_glyphs(number)
+        glyphs.scale(self[-1].height / glyphs[-1].height)
+        glyphs.move_to(self, self.edge_to_fix)
+        glyphs.match_style(self)
+
+        old_family = self.get_family()
+        self.submobjects = glyphs.submobjects
+        for mob in old_family:
+            # Same hack as DecimalNumber.set_value for the animated families
+            mob.points[:] = 0
+        self.number = number
+        return self
+
+
+class Counter(VGroup):
+    """Counter box (see TicketScheduler.create_counter) keeping a direct
+    reference to the GlyphInteger showing its value."""
+
+    def __init__(self, box, label, value, *mobjects, **kwargs):
+        VGroup.__init__(self, box, label, value, *mobjects, **kwargs)
+        self.value = value
+
+    def get_value(self):
+        return self.value.get_value()
+
+    def set_value(self, number):
+        self.value.set_value(number)
+        return self
+
+    def increment(self, value=1):
+        return self.set_value(self.get_value() + value)
+
+
+def ChangeCounters(values, circumscribe=False):
+    """Animations changing each counter ``values`` maps to its value, to be
+    played together."""
+    animations = []
+    for counter, value in values.items():
+        if counter.get_value() == value:
+            continue
+        animations.append(ChangeDecimalToValue(counter.value, value))
+        if circumscribe:
+            animations.append(Circumscribe(counter.value))
+    return animations
+
+
+def IncrementCounters(increments, circumscribe=False):
+    """Animations of the (counter, value) ``increments``, batched in a single
+    animation per counter to the sum of its increments."""
+    values = {}
+    for counter, value in increments:
+        values[counter] = values.get(counter, counter.get_value()) + value
+    return ChangeCounters(values, circumscribe)
 
 
 def IncrementCounter(counter, value=1, circumscribe=False):
-    dec_value = list(
-        filter(lambda x: isinstance(x, DecimalNumber), counter.submobjects)
-    )[0]
-    cdtv = ChangeDecimalToValue(dec_value, dec_value.get_value() + value)
+    cdtv = ChangeDecimalToValue(counter.value, counter.get_value() + value)
     if circumscribe:
-        return [cdtv, Circumscribe(dec_value)]
+        return [cdtv, Circumscribe(counter.value)]
     return cdtv
 
 
@@ -30,40 +427,31 @@ def CounterGiveTicket(counter, ticket, cpu, width=0.5, next_to=DOWN):
 
 
 def get_message_mobj(scale=0.25, opacity=1):
-    message = SVGMobject("ressources/svg/message.svg")
-    message.set_fill(WHITE, opacity=opacity)
-    message.scale(scale)
-    return message
+    return get_svg_mobj("message", scale, WHITE, opacity)
 
 
 def get_lock_mobj(scale=0.25, opacity=1):
-    message = SVGMobject("ressources/svg/lock.svg")
-    message.set_fill(RED, opacity=opacity)
-    message.scale(scale)
-    return message
+    return get_svg_mobj("lock", scale, RED, opacity)
 
 
 def get_cpu_mobj(scale, color=None, name=None):
-    cpu_mobj = SVGMobject("ressources/svg/cpu.svg")
-    if color:
-        cpu_mobj.set_fill(color, opacity=1)
-    if scale:
-        cpu_mobj.scale(scale)
+    cpu_mobj = get_svg_mobj("cpu", scale, color)
     if name:
         name_text = (
-            Text(str(name))
+            get_text(str(name))
             .set_fill(BLACK, 1)
             .move_to(cpu_mobj)
             .shift((DOWN + RIGHT) * cpu_mobj.height / 10)
         )
         name_text.height = cpu_mobj.height / 4
+        if name_text.width > 0.6 * cpu_mobj.width:
+            name_text.width = 0.6 * cpu_mobj.width
         return VGroup(cpu_mobj, name_text)
     return cpu_mobj
 
 
 def get_eyes(which):
-    eyes = SVGMobject(f"ressources/svg/eyes/{which}.svg")
-    return eyes
+    return get_svg_mobj(f"eyes/{which}")
 
 
 def add_eyes_on_cpu(cpu, which="angry", direction="left"):
@@ -72,7 +460,151 @@ def add_eyes_on_cpu(cpu, which="angry", direction="left"):
         eyes.flip(UP)
     eyes.width = 0.85 * cpu.width
     eyes.move_to(cpu.get_center()).shift(cpu.height * UP / 3.5)
-    return VGroup(deepcopy(cpu), eyes)
+    return VGroup(clone(cpu), eyes)
+
+
+def get_n_cpus(default):
+    """Number of CPUs of the scheduler scenes, from the N_CPUS environment
+    variable if set."""
+    return int(os.environ.get("N_CPUS", default))
+
+
+def get_cpu_bins(n_cpus, max_columns=MAX_CPU_COLUMNS):
+    """Number of CPUs shown by each column: one CPU per column if they fit,
+    else the CPUs split as evenly as possible between ``max_columns``."""
+    n_columns = min(n_cpus, max_columns)
+    return n_cpus // n_columns + (np.arange(n_columns) < n_cpus % n_columns)
+
+
+def get_columns_layout(n_columns, margin):
+    """Center of the left ``margin`` of the frame, and centers of the
+    ``n_columns`` columns sharing the rest of its width."""
+    left = config.frame_width * LEFT / 2
+    col_space = (config.frame_width - margin) / n_columns
+    columns = margin + (np.arange(n_columns) + 0.5)[:, None] * col_space
+    return left + margin * RIGHT / 2, left + columns * RIGHT
+
+
+def add_count_badge(mobj, count, color=BLUE):
+    """``mobj`` with a badge in its top right corner showing the ``count`` of
+    CPUs it stands for, if more than one."""
+    if count <= 1:
+        return mobj
+    value = GlyphInteger(count)
+    value.height = 0.2 * mobj.height
+    badge = Circle(radius=0.6 * max(value.width, value.height), color=color)
+    badge.set_fill(color, 1)
+    badge.move_to(mobj.get_corner(UR) + badge.width * (DOWN + LEFT) / 2)
+    value.move_to(badge)
+    return VGroup(mobj, VGroup(badge, value))
+
+
+def is_off_frame(mobj, frame_center=ORIGIN, buff=SMALL_BUFF):
+    """Whether all the points of the family of ``mobj`` are on the same side
+    outside of the frame."""
+    members = mobj.family_members_with_points()
+    if not members:
+        return False
+    points = np.concatenate([member.points for member in members])[:, :2]
+    half_frame = np.array([config.frame_width, config.frame_height]) / 2 + buff
+    return bool(
+        np.any(points.max(axis=0) < frame_center[:2] - half_frame)
+        or np.any(points.min(axis=0) > frame_center[:2] + half_frame)
+    )
+
+
+def is_transparent(mobj):
+    """Whether no member of the family of ``mobj`` draws anything."""
+    for member in mobj.family_members_with_points():
+        if not isinstance(member, VMobject):
+            return False
+        if np.any(member.get_fill_opacities() > 0):
+            return False
+        for width, opacities in (
+            (member.get_stroke_width(), member.get_stroke_opacities()),
+            (
+                member.get_stroke_width(background=True),
+                member.get_stroke_opacities(background=True),
+            ),
+        ):
+            if width > 0 and np.any(opacities > 0):
+                return False
+    return True
+
+
+def get_arrays_nbytes(mobj):
+    """Bytes of the arrays (points, colors) of the family of ``mobj``."""
+    return sum(
+        value.nbytes
+        for member in mobj.get_family()
+        for value in vars(member).values()
+        if isinstance(value, np.ndarray)
+    )
+
+
+class EvictingScene(Scene):
+    """Scene that removes, after each animation, the mobjects left fully
+    outside of the frame or fully transparent, so that the following plays
+    neither update nor draw them. Mobjects with updaters are kept, and an
+    evicted mobject that is animated again is added back by the play."""
+
+    def setup(self):
+        Scene.setup(self)
+        self.evicted_mobjects = 0
+        self.evicted_nbytes = 0
+
+    def play(self, *args, **kwargs):
+        Scene.play(self, *args, **kwargs)
+        if not all(isinstance(animation, Wait) for animation in self.animations):
+            self.evict_hidden_mobjects()
+
+    def evict_hidden_mobjects(self):
+        frame_center = self.renderer.camera.frame_center
+        hidden = [
+            mobj
+            for mobj in self.mobjects
+            if mobj not in self.foreground_mobjects
+            and not mobj.get_family_updaters()
+            and (is_off_frame(mobj, frame_center) or is_transparent(mobj))
+        ]
+        if not hidden:
+            return
+        self.remove(*hidden)
+        nbytes = sum(map(get_arrays_nbytes, hidden))
+        self.evicted_mobjects += len(hidden)
+        self.evicted_nbytes += nbytes
+        logger.debug(
+            f"{self} : Evicted {len(hidden)} hidden mobjects ({nbytes / 1024:.1f} KiB)"
+        )
+
+    def tear_down(self):
+        Scene.tear_down(self)
+        if self.evicted_mobjects:
+            logger.info(
+                f"{self} : Evicted {self.evicted_mobjects} hidden mobjects, "
+                f"{self.evicted_nbytes / 1024:.1f} KiB of points and colors"
+            )
+
+
+class SectionedScene(EvictingScene):
+    """Scene whose construct runs the methods named in SECTIONS, in order.
+
+    State shared between sections is kept on self. When the renderer supports
+    it (see video_renderer.VideoRenderer), the scene is checkpointed after each
+    section and a render starts after the latest valid checkpoint.
+    """
+
+    SECTIONS = ()
+
+    def construct(self):
+        start_from = 0
+        if hasattr(self.renderer, "restore_checkpoint"):
+            start_from = self.renderer.restore_checkpoint(self)
+
+        for section in self.SECTIONS[start_from:]:
+            getattr(self, section)()
+            if hasattr(self.renderer, "save_checkpoint"):
+                self.renderer.save_checkpoint(self, section)
 
 
 class Title(Scene):
@@ -82,20 +614,20 @@ class Title(Scene):
             width=0.85 * config.frame_width, height=0.8 * config.frame_height
         )
 
-        this_is = Tex("This is the presentation of")
+        this_is = get_tex("This is the presentation of")
         this_is.next_to(frame.get_top(), DOWN, 0)
 
-        paper_name = Tex(
+        paper_name = get_tex(
             '"Advanced synchronization techniques \
                     for task-based runtime systems"'
         ).move_to(frame)
         paper_name.width = frame.width
 
-        in_5_minutes = Tex("in 5 minutes...")
+        in_5_minutes = get_tex("in 5 minutes...")
         in_5_minutes.next_to(frame.get_corner(DOWN + RIGHT), UP + LEFT, 0)
 
         paper_link = (
-            Tex("https://dl.acm.org/doi/10.1145/3437801.3441601", color=BLUE)
+            get_tex("https://dl.acm.org/doi/10.1145/3437801.3441601", color=BLUE)
             .scale(0.5)
             .next_to(frame.get_corner(DOWN + LEFT), UP + RIGHT, 0)
         )
@@ -141,6 +673,9 @@ class CoresEvolution(GraphScene):
         2021: 128,
     }
 
+    DOT_RUN_TIME = 1
+    MAX_SCATTER_RUN_TIME = 30
+
     def __init__(self, **kwargs):
         GraphScene.__init__(
             self,
@@ -157,24 +692,39 @@ class CoresEvolution(GraphScene):
             **kwargs,
         )
 
-    def construct(self):
-        from scipy.optimize import curve_fit
+    def coords_to_points(self, X, y):
+        """Vectorized coords_to_point, the axes being an affine map."""
+        origin = self.coords_to_point(X[0], y[0])
+        x_step = self.coords_to_point(X[0] + 1, y[0]) - origin
+        y_step = self.coords_to_point(X[0], y[0] + 1) - origin
+        return (
+            origin
+            + np.outer(np.asarray(X) - X[0], x_step)
+            + np.outer(np.asarray(y) - y[0], y_step)
+        )
+
+    @classmethod
+    def get_trend(cls):
+        """Coefficients (a, b) of the trend line a * exp(b * (year - 2000))."""
+        return fit_exponential(cls.CPU_CORES, x_origin=2000)
 
+    def construct(self):
         self.setup_axes(animate=True)
 
         X = np.array(list(CoresEvolution.CPU_CORES.keys()))
         y = np.array(list(CoresEvolution.CPU_CORES.values()))
 
-        [a, b], res1 = curve_fit(lambda x1, a, b: a * np.exp(b * (x1 - 2000)), X, y)
+        a, b = self.get_trend()
 
         func = lambda v: a * np.exp(b * (v - 2000))
 
         graph = self.get_graph(func, x_min=X[0], x_max=X[-1], y_max=128, color=ORANGE)
 
-        for x, y in CoresEvolution.CPU_CORES.items():
-            d = Dot(color=BLUE).move_to(self.coords_to_point(x, y))
-            self.play(Create(d))
-            self.wait(0)
+        dots = get_scatter_dots(self.coords_to_points(X, y), color=BLUE)
+        self.play(
+            Create(dots, lag_ratio=1),
+            run_time=min(len(dots) * self.DOT_RUN_TIME, self.MAX_SCATTER_RUN_TIME),
+        )
 
         self.play(Create(graph))
 
@@ -189,16 +739,16 @@ class PaperSummary(Scene):
             width=0.85 * config.frame_width, height=0.7 * config.frame_height
         )
 
-        title = Text("Paper improvements").next_to(frame.get_top(), DOWN, 0)
+        title = get_text("Paper improvements").next_to(frame.get_top(), DOWN, 0)
 
         p01 = (
-            Text("Wait-free data structure")
+            get_text("Wait-free data structure")
             .scale(text_scale)
             .next_to(frame.get_left(), RIGHT, 0)
             .shift(RIGHT + UP + 0.5 * DOWN)
         )
         p02 = (
-            Text("Task scheduler based on delegation")
+            get_text("Task scheduler based on delegation")
             .scale(text_scale)
             .next_to(frame.get_left(), RIGHT, 0)
             .shift(RIGHT + 1.5 * DOWN)
@@ -211,7 +761,7 @@ class PaperSummary(Scene):
             self.play(Write(p), Create(d))
 
 
-class DataDependencies(Scene):
+class DataDependencies(EvictingScene):
     def construct(self):
         code = """
 int A = 42;
@@ -228,13 +778,14 @@ int A = 42;
 }
         """
 
-        rendered_code = Code(
-            code=code,
+        listing = CodeListing(
+            code,
             tab_width=4,
             background="window",
             language="java",
             font="Monospace",
         )
+        rendered_code = listing.get_window()
         rendered_code.width = 5
         rendered_code.shift(4 * LEFT)
 
@@ -261,7 +812,7 @@ int A = 42;
         def get_default_task(name, color, pos):
             circle = Circle(radius=0.5, color=color, fill_opacity=0.5)
 
-            text = Text(name)
+            text = get_text(name)
 
             circle_text = VGroup(circle, text)
             circle_text.arrange(IN)
@@ -274,7 +825,7 @@ int A = 42;
             arrow = Arrow(task1, task2, buff=0)
             angle = arrow.get_angle()
 
-            text = Text(title, size=0.4)
+            text = get_text(title, size=0.4)
             to_shift = text.height
 
             text.move_to(arrow)
@@ -354,13 +905,19 @@ int A = 42;
         self.wait()
 
 
-class ASMStates(Scene):
+class ASMStates(EvictingScene):
+    ASM_ACCESSES = 1_000_000
+    ASM_STEPS = 60
+    ASM_SNAPSHOT_STEPS = 10
+    # Drafts simulate one access out of ASM_DRAFT_SCALE
+    ASM_DRAFT_SCALE = 100
+
     def get_data_access_block(self, height=2.5, width=3.7, values=None):
         block = VGroup()
         rect = Rectangle(color=WHITE, height=height, width=width)
         h_line = Line(rect.get_left(), rect.get_right()).shift(0.3 * rect.height * UP)
 
-        title_text = Text("DataAccess A")
+        title_text = get_text("DataAccess A")
         title_text.scale(0.7)
         title_text.set_color(BLUE)
         title_text.move_to(VGroup(h_line, VectorizedPoint(rect.get_top())))
@@ -387,7 +944,7 @@ class ASMStates(Scene):
         rect = RoundedRectangle(color=BLUE, width=width, height=height)
         rect.set_fill(BLUE, opacity=0.05)
 
-        name_asm = Text(name, color=BLUE)
+        name_asm = get_text(name, color=BLUE)
         name_asm.scale(0.4)
         move_to = rect.get_center() + np.array([-rect.height / 2, rect.width / 2, 1])
         name_asm.next_to(rect.get_left() + rect.get_top(), DOWN + RIGHT, MED_SMALL_BUFF)
@@ -398,7 +955,7 @@ class ASMStates(Scene):
     def get_state(self, bits, radius=0.5, scale_text=0.2):
         circle = Circle(radius=radius, color=ORANGE, fill_opacity=0.5)
 
-        text = Text(bits)
+        text = get_text(bits)
         text.move_to(circle)
         text.scale(scale_text)
 
@@ -406,6 +963,24 @@ class ASMStates(Scene):
 
         return circle_text
 
+    def get_occupancy_chart(self, occupancy, states):
+        chart = BarChart(
+            occupancy[states] / occupancy.sum(),
+            height=0.45 * config.frame_height,
+            width=0.7 * config.frame_width,
+            bar_colors=[ORANGE, YELLOW],
+            bar_names=[f"{state:#06b}" for state in states],
+            bar_label_scale_val=0.5,
+        )
+        chart.shift(0.5 * DOWN)
+        return chart
+
+    def get_step_text(self, step):
+        step_text = get_text(f"Step {step}")
+        step_text.scale(0.5)
+        step_text.to_corner(UP + RIGHT)
+        return step_text
+
     def construct(self):
         data_access_block = self.get_data_access_block()
         data_access_block.move_to(ORIGIN)
@@ -475,7 +1050,7 @@ class ASMStates(Scene):
 
             if prev_state:
                 arrow = Arrow(prev_state, state, color=WHITE, buff=0)
-                text = Text(arrow_message)
+                text = get_text(arrow_message)
                 text.scale(0.3)
                 text.next_to(arrow, UP, MED_LARGE_BUFF)
                 # text.shift((dist_states - 2 * radius) * LEFT / 5)
@@ -526,18 +1101,50 @@ class ASMStates(Scene):
 
         self.wait()
 
+        # How many of a million DataAccess objects sit in each state
+        self.remove(*self.mobjects)
+        scale = 1
+        if getattr(self.renderer, "draft_step", 1) > 1:
+            scale = self.ASM_DRAFT_SCALE
+        occupancy = scale * get_asm_occupancy(
+            self.ASM_ACCESSES // scale, self.ASM_STEPS
+        )
+        states = np.flatnonzero(occupancy.any(axis=0))
+
+        title = get_text(f"{self.ASM_ACCESSES:,} DataAccess", color=BLUE)
+        title.scale(0.6)
+        title.to_corner(UP + LEFT)
+        chart = self.get_occupancy_chart(occupancy[0], states)
+        step_text = self.get_step_text(0)
+
+        self.play(Write(title), Create(chart), FadeIn(step_text))
+        self.wait()
+
+        for step in range(
+            self.ASM_SNAPSHOT_STEPS, self.ASM_STEPS + 1, self.ASM_SNAPSHOT_STEPS
+        ):
+            self.play(
+                Transform(chart, self.get_occupancy_chart(occupancy[step], states)),
+                Transform(step_text, self.get_step_text(step)),
+            )
+            self.wait(0.5)
+
+        self.wait()
+
 
 class SchedulerWaitFree(Scene):
+    N_CPUS = get_n_cpus(3)
+
     def stack(self, mobj, num, title=None):
         stack = VGroup()
         for n in range(num):
             delta = (num - n - 1) * np.array([0.05, 0.05, -1])
-            new_mobj = deepcopy(mobj)
+            new_mobj = clone(mobj)
             new_mobj.shift(delta)
             stack.add(new_mobj)
 
         if title:
-            title_mobj = Text(title)
+            title_mobj = get_text(title)
             title_mobj.width = 1.25 * stack.width
             title_mobj.next_to(stack, UP, SMALL_BUFF)
             stack.add(title_mobj)
@@ -546,74 +1153,65 @@ class SchedulerWaitFree(Scene):
 
     def construct(self):
         _TOP = config.frame_height / 2 * UP
-        _BOTTOM = -_TOP
-        _RIGHT = config.frame_width / 2 * RIGHT
-        _LEFT = -_RIGHT
 
-        N_CPUS = 3
-        H_SPACE = config.frame_width / 8
+        CPU_BINS = get_cpu_bins(self.N_CPUS)
+        N_COLUMNS = len(CPU_BINS)
         MARGIN = config.frame_width / 7
         USABLE_WIDTH = config.frame_width - MARGIN
-        COL_SPACE = (USABLE_WIDTH) / N_CPUS
-
-        V_LINES = VGroup(
-            Line(
-                config.top + config.frame_width * LEFT / 2 + (MARGIN) * RIGHT,
-                config.bottom + config.frame_width * LEFT / 2 + (MARGIN) * RIGHT,
-            )
-        )
-
-        for _ in range(N_CPUS):
-            new_line = deepcopy(V_LINES.submobjects[-1])
-            V_LINES.add(new_line.shift(COL_SPACE * RIGHT))
-
-        def get_center_col(idx):
-            return VGroup(
-                V_LINES.submobjects[idx], V_LINES.submobjects[idx + 1]
-            ).get_center()
-
-        def get_center_margin():
-            return VGroup(
-                Line(_TOP + _LEFT, _BOTTOM + _LEFT), V_LINES.submobjects[0]
-            ).get_center()
+        COL_SPACE = (USABLE_WIDTH) / N_COLUMNS
+        MARGIN_CENTER, COL_CENTERS = get_columns_layout(N_COLUMNS, MARGIN)
 
         cpu_mobj = get_cpu_mobj(0.4)
         queue_mobj = Rectangle(width=0.33 * COL_SPACE, height=0.2 * config.frame_height)
         queue_mobj.set_fill(BLUE, opacity=0.5)
 
+        # Every column is laid out the same way, so its mobjects are shifted
+        # clones of the ones of the first column
+        creator_center = (
+            COL_CENTERS[0] + _TOP + (MED_SMALL_BUFF + cpu_mobj.height) * DOWN
+        )
+        creator_bottom = creator_center + cpu_mobj.height * DOWN / 2
+        queue_mobj.next_to(creator_bottom, DOWN, MED_LARGE_BUFF)
+        arrow_mobj = Arrow(
+            creator_bottom,
+            queue_mobj.get_center() + queue_mobj.height * UP / 2,
+            buff=0,
+        )
+
         creators_group = VGroup()
         queues_group = VGroup()
         arrows_group = VGroup()
-        for cpu_idx in range(N_CPUS):
-            curr_cpu_mobj = deepcopy(cpu_mobj)
-            curr_cpu_mobj.move_to(get_center_col(cpu_idx))
-            curr_cpu_mobj.shift(_TOP + (MED_SMALL_BUFF + curr_cpu_mobj.height) * DOWN)
-            creators_group.add(curr_cpu_mobj)
-
-            curr_queue_mobj = deepcopy(queue_mobj)
-            curr_queue_mobj.next_to(curr_cpu_mobj, DOWN, MED_LARGE_BUFF)
-            queues_group.add(curr_queue_mobj)
-
-            arrow = Arrow(
-                curr_cpu_mobj.get_center() + curr_cpu_mobj.height * DOWN / 2,
-                curr_queue_mobj.get_center() + curr_queue_mobj.height * UP / 2,
-                buff=0,
+        for cpu_idx, count in enumerate(CPU_BINS):
+            shift = COL_CENTERS[cpu_idx] - COL_CENTERS[0]
+            # Placed before the badge is added, to center the CPU itself
+            curr_cpu_mobj = add_count_badge(
+                clone(cpu_mobj).move_to(creator_center + shift), count
             )
-            arrows_group.add(arrow)
+            creators_group.add(curr_cpu_mobj)
+            queues_group.add(clone(queue_mobj).shift(shift))
+            arrows_group.add(clone(arrow_mobj).shift(shift))
 
         text_scale = 0.4
         text_color = WHITE
         margin_texts_group = VGroup()
         creator_mobj = (
-            (Text("Creator\nThreads").scale(text_scale).set_fill(text_color, opacity=1))
-            .move_to(get_center_margin())
+            (
+                get_text("Creator\nThreads")
+                .scale(text_scale)
+                .set_fill(text_color, opacity=1)
+            )
+            .move_to(MARGIN_CENTER)
             .shift(creators_group.get_center() * UP)
         )
         margin_texts_group.add(creator_mobj)
 
         queue_mobj = (
-            (Text("Thread\nQueues").scale(text_scale).set_fill(text_color, opacity=1))
-            .move_to(get_center_margin())
+            (
+                get_text("Thread\nQueues")
+                .scale(text_scale)
+                .set_fill(text_color, opacity=1)
+            )
+            .move_to(MARGIN_CENTER)
             .shift(queues_group.get_center() * UP)
         )
         margin_texts_group.add(queue_mobj)
@@ -628,24 +1226,28 @@ class SchedulerWaitFree(Scene):
         self.wait()
 
         scheduler_queue_mobj = Rectangle(
-            width=0.8 * N_CPUS * COL_SPACE, height=0.2 * config.frame_height
+            width=0.8 * N_COLUMNS * COL_SPACE, height=0.2 * config.frame_height
         ).next_to(queues_group, DOWN, MED_LARGE_BUFF)
         scheduler_queue_mobj.set_fill(GREY, 0.2)
 
-        queues_to_scheduler_arrows_group = VGroup()
-        for queue in queues_group.submobjects:
-            start = queue.get_center() + queue.height * DOWN / 2
-            end = start + (scheduler_queue_mobj.get_top() - queues_group.get_bottom())
-            arrow = Arrow(start, end, buff=0)
-            queues_to_scheduler_arrows_group.add(arrow)
+        queue = queues_group[0]
+        start = queue.get_center() + queue.height * DOWN / 2
+        end = start + (scheduler_queue_mobj.get_top() - queues_group.get_bottom())
+        arrow_mobj = Arrow(start, end, buff=0)
+        queues_to_scheduler_arrows_group = VGroup(
+            *[
+                clone(arrow_mobj).shift(center - COL_CENTERS[0])
+                for center in COL_CENTERS
+            ]
+        )
 
         scheduler_queue_text_mobj = (
             (
-                Text("Scheduler\n   Queue")
+                get_text("Scheduler\n   Queue")
                 .scale(text_scale)
                 .set_fill(text_color, opacity=1)
             )
-            .move_to(get_center_margin())
+            .move_to(MARGIN_CENTER)
             .shift(scheduler_queue_mobj.get_center() * UP)
         )
         margin_texts_group.add(scheduler_queue_text_mobj)
@@ -657,28 +1259,32 @@ class SchedulerWaitFree(Scene):
         )
         self.wait()
 
+        worker_center = COL_CENTERS[0] + (
+            (scheduler_queue_mobj.height + MED_SMALL_BUFF + cpu_mobj.height) * DOWN
+        )
+        arrow_mobj = Arrow(
+            worker_center * RIGHT + scheduler_queue_mobj.get_bottom() * UP,
+            worker_center * RIGHT + (worker_center + cpu_mobj.height * UP / 2) * UP,
+            buff=0,
+        )
+
         workers_group = VGroup()
         scheduler_to_workers_arrows_group = VGroup()
-        for cpu_idx in range(N_CPUS):
-            curr_cpu_mobj = deepcopy(cpu_mobj)
-            curr_cpu_mobj.move_to(get_center_col(cpu_idx))
-            curr_cpu_mobj.shift(
-                (scheduler_queue_mobj.height + MED_SMALL_BUFF + curr_cpu_mobj.height)
-                * DOWN
+        for cpu_idx, count in enumerate(CPU_BINS):
+            shift = COL_CENTERS[cpu_idx] - COL_CENTERS[0]
+            curr_cpu_mobj = add_count_badge(
+                clone(cpu_mobj).move_to(worker_center + shift), count
             )
             workers_group.add(curr_cpu_mobj)
-
-            arrow = Arrow(
-                curr_cpu_mobj.get_center() * RIGHT
-                + scheduler_queue_mobj.get_bottom() * UP,
-                curr_cpu_mobj.get_center() * RIGHT + curr_cpu_mobj.get_top() * UP,
-                buff=0,
-            )
-            scheduler_to_workers_arrows_group.add(arrow)
+            scheduler_to_workers_arrows_group.add(clone(arrow_mobj).shift(shift))
 
         worker_mobj = (
-            (Text(" Worker\nThreads").scale(text_scale).set_fill(text_color, opacity=1))
-            .move_to(get_center_margin())
+            (
+                get_text(" Worker\nThreads")
+                .scale(text_scale)
+                .set_fill(text_color, opacity=1)
+            )
+            .move_to(MARGIN_CENTER)
             .shift(workers_group.get_center() * UP)
         )
         margin_texts_group.add(worker_mobj)
@@ -690,35 +1296,37 @@ class SchedulerWaitFree(Scene):
         )
         self.wait()
 
-        lock_creator_queues_mobj = VGroup()
-        for cpu, queue in zip(creators_group, queues_group):
-            height = (
-                SMALL_BUFF
-                + (cpu.get_top() - queue.get_center() - 0.15 * queue.height)[1]
-            )
-            lock_fill_mobj = RoundedRectangle(
-                width=1.25 * queue.width, height=height, color=RED
-            )
-            lock_fill_mobj.set_fill(RED, opacity=0.1)
-            lock_fill_mobj.move_to(
-                cpu.get_center() * RIGHT
-                + (cpu.get_top() + SMALL_BUFF - lock_fill_mobj.height / 2) * UP
-            )
+        cpu, queue = creators_group[0], queues_group[0]
+        height = (
+            SMALL_BUFF + (cpu.get_top() - queue.get_center() - 0.15 * queue.height)[1]
+        )
+        lock_fill_mobj = RoundedRectangle(
+            width=1.25 * queue.width, height=height, color=RED
+        )
+        lock_fill_mobj.set_fill(RED, opacity=0.1)
+        lock_fill_mobj.move_to(
+            cpu.get_center() * RIGHT
+            + (cpu.get_top() + SMALL_BUFF - lock_fill_mobj.height / 2) * UP
+        )
 
-            lock_mobj = get_lock_mobj(scale=0.15)
-            lock_mobj.next_to(
-                queue.get_right() * RIGHT + queue.get_top() * UP,
-                LEFT + DOWN,
-                SMALL_BUFF,
-            )
+        lock_mobj = get_lock_mobj(scale=0.15)
+        lock_mobj.next_to(
+            queue.get_right() * RIGHT + queue.get_top() * UP,
+            LEFT + DOWN,
+            SMALL_BUFF,
+        )
 
-            producer_mobj = Text("Producer").scale(text_scale).set_fill(RED, 1)
-            producer_mobj.rotate(PI / 2)
-            producer_mobj.next_to(lock_fill_mobj, LEFT, SMALL_BUFF)
+        producer_mobj = get_text("Producer").scale(text_scale).set_fill(RED, 1)
+        producer_mobj.rotate(PI / 2)
+        producer_mobj.next_to(lock_fill_mobj, LEFT, SMALL_BUFF)
 
-            lock_creator_queues_mobj.add(
-                VGroup(lock_fill_mobj, lock_mobj, producer_mobj)
-            )
+        lock_creator_queue_mobj = VGroup(lock_fill_mobj, lock_mobj, producer_mobj)
+        lock_creator_queues_mobj = VGroup(
+            *[
+                clone(lock_creator_queue_mobj).shift(center - COL_CENTERS[0])
+                for center in COL_CENTERS
+            ]
+        )
 
         height = (
             SMALL_BUFF
@@ -743,7 +1351,7 @@ class SchedulerWaitFree(Scene):
         )
 
         consummer_mobj = (
-            Text("Consumer")
+            get_text("Consumer")
             .scale(text_scale)
             .set_fill(RED, 1)
             .rotate(PI / 2)
@@ -792,16 +1400,16 @@ class ButHowWorkers(Scene):
         rect_text = Rectangle(
             width=0.75 * config.frame_width, height=0.75 * config.frame_height
         )
-        but_how = Text("But how", size=1.5).next_to(
+        but_how = get_text("But how", size=1.5).next_to(
             rect_text.get_left() * RIGHT + rect_text.get_top() * UP,
             DOWN + RIGHT,
             SMALL_BUFF,
         )
-        workers_thread = Text("worker threads", size=1.5, color=BLUE).move_to(
+        workers_thread = get_text("worker threads", size=1.5, color=BLUE).move_to(
             rect_text.get_center()
         )
 
-        receive_work = Text("receive work?", size=1.5).next_to(
+        receive_work = get_text("receive work?", size=1.5).next_to(
             rect_text.get_right() * RIGHT + rect_text.get_bottom() * UP,
             UP + LEFT,
             SMALL_BUFF,
@@ -812,14 +1420,14 @@ class ButHowWorkers(Scene):
         cpu_mobj = get_cpu_mobj(0.75).next_to(
             rect_text.get_top() * UP + rect_text.get_right() * RIGHT, DOWN + LEFT, 0
         )
-        interrogation_mobj = Text("?").next_to(
+        interrogation_mobj = get_text("?").next_to(
             cpu_mobj.get_top() * UP + cpu_mobj.get_right() * RIGHT,
             UP + RIGHT,
             -SMALL_BUFF,
         )
         interrogation_group = VGroup(
             *[
-                deepcopy(interrogation_mobj).shift(idx * 0.2 * (RIGHT + UP))
+                clone(interrogation_mobj).shift(idx * 0.2 * (RIGHT + UP))
                 for idx in range(3)
             ]
         )
@@ -830,65 +1438,14 @@ class ButHowWorkers(Scene):
         self.wait()
 
 
-class WaitingQueue:
-    def __init__(self, available_places, length, color=WHITE, title=None):
-        self._available_places = available_places
-        self._hspace = length / available_places
-        self._queue = Rectangle(width=length, height=self._hspace, color=color)
-        self._vlines = VGroup(
-            *[
-                Line(self._queue.get_top(), self._queue.get_bottom()).move_to(
-                    self._queue.get_left() + idx * self._hspace * RIGHT
-                )
-                for idx in range(1, available_places)
-            ]
-        )
-        self._values = VGroup(
-            *[
-                Integer(-1)
-                .move_to(self._queue.get_left() + RIGHT * self._hspace / 2)
-                .shift(idx * self._hspace * RIGHT)
-                for idx in range(available_places)
-            ]
-        )
+class SlotQueue:
+    """Rectangle of ``len(ROWS)`` rows of ``available_places`` slots, each
+    holding an integer. The centers, values and colors of the slots are
+    arrays of shape (len(ROWS), available_places), and the slots are laid out
+    in one pass from them, with digits cloned from DIGIT_GLYPHS."""
 
-        self._mobj = VGroup(self._queue, self._vlines, self._values)
+    ROWS = ("values",)
 
-        # self._title = None
-        # if title:
-        #     self._title = Text(title)
-        #     self._title.next_to(self._queue, LEFT, SMALL_BUFF)
-        #     self._title.width = self._hspace
-        #     self._mobj.add(self._title)
-
-    @property
-    def mobj(self):
-        return self._mobj
-
-    def get(self, idx, which="center"):
-        return getattr(self[idx], f"get_{which}")
-
-    def get_center_top(self, idx):
-        return self[idx].get_center() + self._hspace * UP
-
-    def set(self, idx, function, *args, **kwargs):
-        value = self[idx]
-        center = value.get_center()
-        ret = getattr(value, function)(*args, **kwargs)
-        value.move_to(center)
-        return ret
-
-    def __getitem__(self, key):
-        return self._values.submobjects[key]
-
-    def __setitem__(self, key, value):
-        return self._values.submobjects[key]
-
-    def __len__(self):
-        return self._available_places
-
-
-class DelegatinQueue:
     def __init__(
         self,
         available_places,
@@ -898,49 +1455,58 @@ class DelegatinQueue:
         default_values=None,
         default_colors=None,
     ):
+        n_rows = len(self.ROWS)
         self._available_places = available_places
         self._hspace = length / available_places
-        self._queue = Rectangle(width=length, height=3 * self._hspace, color=color)
-        self._vlines = VGroup(
-            *[
-                Line(self._queue.get_top(), self._queue.get_bottom()).move_to(
-                    self._queue.get_left() + idx * self._hspace * RIGHT
-                )
-                for idx in range(1, available_places)
-            ]
-        )
-        self._hlines = VGroup(
-            *[
-                Line(self._queue.get_left(), self._queue.get_right()).shift(
-                    (-1) ** idx * self._hspace * UP / 2
-                )
-                for idx in range(2)
-            ]
-        )
+        self._queue = Rectangle(width=length, height=n_rows * self._hspace, color=color)
+        top_left = self._queue.get_corner(UL)
+
+        # Offsets of the slot centers from the top left corner of the queue
+        columns = (np.arange(available_places) + 0.5)[None, :, None] * RIGHT
+        rows = (np.arange(n_rows) + 0.5)[:, None, None] * DOWN
+        self._offsets = (columns + rows) * self._hspace
+
+        self._mobj = VGroup(self._queue)
+        if available_places > 1:
+            xs = (
+                top_left
+                + np.arange(1, available_places)[:, None] * self._hspace * RIGHT
+            )
+            self._vlines = get_segments(xs, xs + n_rows * self._hspace * DOWN)
+            self._mobj.add(self._vlines)
+        if n_rows > 1:
+            ys = top_left + np.arange(1, n_rows)[:, None] * self._hspace * DOWN
+            self._hlines = get_segments(ys, ys + length * RIGHT)
+            self._mobj.add(self._hlines)
+
         if default_values is None:
-            default_values = np.full((3, available_places), -1, dtype=np.object_)
+            default_values = np.full((n_rows, available_places), -1)
         if default_colors is None:
-            default_colors = np.full((3, available_places), WHITE)
-        self._values = VDict(
-            {
-                key: VGroup(
+            default_colors = np.full((n_rows, available_places), WHITE)
+        self._values = np.array(default_values, dtype=np.int64)
+        self._colors = np.array(default_colors, dtype=np.object_)
+
+        # One glyph template per distinct value, at the size of an Integer
+        templates = {
+            value: GlyphInteger(value).move_to(ORIGIN)
+            for value in np.unique(self._values)
+        }
+
+        centers = top_left + self._offsets
+        self._slots = VGroup(
+            *[
+                VGroup(
                     *[
-                        Integer(default_values[hidx, idx])
-                        .move_to(
-                            self.get_center(hidx, idx)
-                            # self._queue.get_left()
-                            # + self._hspace * (UP - hidx * DOWN + RIGHT / 2)
-                            # + (RIGHT) * self._hspace / 2
-                        )
-                        .set_fill(default_colors[hidx, idx], 1)
+                        clone(templates[self._values[row, idx]])
+                        .shift(centers[row, idx])
+                        .set_fill(self._colors[row, idx], 1)
                         for idx in range(available_places)
                     ]
                 )
-                for hidx, key in enumerate(["now_serving", "result", "request"])
-            }
+                for row in range(n_rows)
+            ]
         )
-
-        self._mobj = VGroup(self._queue, self._vlines, self._hlines, self._values)
+        self._mobj.add(self._slots)
 
         # self._title = None
         # if title:
@@ -953,53 +1519,114 @@ class DelegatinQueue:
     def mobj(self):
         return self._mobj
 
+    def get_index(self, key):
+        """(row, column) of the slot ``key``."""
+        return key
+
     def get(self, idx, which="center"):
         return getattr(self[idx], f"get_{which}")
 
+    def get_centers(self):
+        return self._queue.get_corner(UL) + self._offsets
+
     def get_center(self, y, x):
-        top_left = self._queue.get_top() * UP + self._queue.get_left() * RIGHT
-        return top_left + ((y + 0.5) * DOWN + (x + 0.5) * RIGHT) * self._hspace
+        return self._queue.get_corner(UL) + self._offsets[y, x]
 
     def get_center_top(self, idx):
-        return self[idx].get_center() + self._hspace * UP
+        return self.get_center(*self.get_index(idx)) + self._hspace * UP
+
+    def get_value(self, key):
+        return self._values[self.get_index(key)]
 
     def set(self, key, function, *args, **kwargs):
         value = self[key]
         center = value.get_center()
         ret = getattr(value, function)(*args, **kwargs)
         value.move_to(center)
+        self._values[self.get_index(key)] = value.get_value()
         return ret
 
-    def __getitem__(self, key):
-        key_dict, key_value = key
-        return self._values[key_dict].submobjects[key_value]
+    def set_values(self, values, colors=None):
+        """Sets the slots ``values`` maps to their value, and to the color
+        ``colors`` maps them to, skipping the slots that don't change."""
+        for key, value in values.items():
+            index = self.get_index(key)
+            if self._values[index] != value:
+                self._values[index] = value
+                self[key].set_value(value)
+        for key, color in (colors or {}).items():
+            index = self.get_index(key)
+            if self._colors[index] != color:
+                self._colors[index] = color
+                self[key].set_fill(color, 1)
+
+    def change_values(self, values, circumscribe=False):
+        """Animations changing all the slots ``values`` maps to their value,
+        to be played together."""
+        animations = []
+        for key, value in values.items():
+            index = self.get_index(key)
+            if self._values[index] == value:
+                continue
+            self._values[index] = value
+            animations.append(ChangeDecimalToValue(self[key], value))
+            if circumscribe:
+                animations.append(Circumscribe(self[key]))
+        return animations
 
-    # def __setitem__(self, key, value):
-    #     return self._values.submobjects[key]
+    def __getitem__(self, key):
+        row, idx = self.get_index(key)
+        return self._slots.submobjects[row].submobjects[idx]
 
     def __len__(self):
         return self._available_places
 
 
-class TicketScheduler(Scene):
+class WaitingQueue(SlotQueue):
+    def get_index(self, idx):
+        return 0, idx
+
+
+class DelegatinQueue(SlotQueue):
+    ROWS = ("now_serving", "result", "request")
+
+    def get_index(self, key):
+        key_dict, key_value = key
+        return self.ROWS.index(key_dict), key_value
+
+
+class TicketScheduler(SectionedScene):
+    SECTIONS = (
+        "hand_out_tickets",
+        "show_waiting_queue",
+        "swap_delegation_queue",
+        "delegate",
+        "replay_trace",
+    )
+
+    N_CPUS = get_n_cpus(2)
+    CPU_SIZE = 0.4
+    BUBBLE_TEXT_SIZE = 0.4
+    # Simulated lock replayed by replay_trace, and its time window
+    TRACE_DESIGN = "delegation"
+    TRACE_WINDOW = (40.0, 60.0)
+    TRACE_MAX_EVENTS = 24
+
     def create_counter(
         self, width, height, color=BLUE, counter_text="Now serving", locked=True
     ):
-        counter = VGroup()
         rect = Rectangle(width=width, height=height, color=color).set_fill(
             color, opacity=0.5
         )
 
-        counter.add(rect)
-
-        text = Text(counter_text, color=WHITE)
+        text = get_text(counter_text, color=WHITE)
         text.width = 0.85 * rect.width
         text.next_to(rect.get_center() * RIGHT + rect.get_top() * UP, DOWN, SMALL_BUFF)
-        counter.add(text)
 
-        value = Integer(0)
+        value = GlyphInteger(0)
         value.move_to(rect.get_center()).shift(DOWN * text.height / 2)
-        counter.add(value)
+
+        counter = Counter(rect, text, value)
 
         if locked:
             lock_mobj = get_lock_mobj(0.2).set_fill(WHITE, 1)
@@ -1008,79 +1635,52 @@ class TicketScheduler(Scene):
 
         return counter
 
-    def create_ticket(self, num, radius=0.01, color=ORANGE):
+    def create_ticket(self, num, radius=0.01, color=ORANGE, count=1):
         circle = Circle(radius=radius, color=color).set_fill(color, opacity=0.7)
-        ticket = Text(f"Ticket {num}", color=WHITE)
+        if count > 1:
+            ticket = get_text(f"Tickets {num}-{num + count - 1}", color=WHITE)
+        else:
+            ticket = get_text(f"Ticket {num}", color=WHITE)
         ticket.width = 1.8 * radius
 
         return VGroup(circle, ticket)
 
-    def get_next_ticket_value(self, counter):
-        dec_value = list(
-            filter(lambda x: isinstance(x, DecimalNumber), counter.submobjects)
-        )[0]
-        return dec_value.get_value()
-
-    def increment_counter(self, counter, value=1):
-        dec_value = list(
-            filter(lambda x: isinstance(x, DecimalNumber), counter.submobjects)
-        )[0]
-        dec_value.increment_value(value)
-
-    def construct(self):
+    def hand_out_tickets(self):
         _TOP = config.frame_height / 2 * UP
         _BOTTOM = -_TOP
         _RIGHT = config.frame_width / 2 * RIGHT
         _LEFT = -_RIGHT
 
-        N_CPUS = 2
-        H_SPACE = config.frame_width / 8
+        CPU_BINS = get_cpu_bins(self.N_CPUS)
         MARGIN = config.frame_width / 5
         USABLE_WIDTH = config.frame_width - MARGIN
-        COL_SPACE = (USABLE_WIDTH) / N_CPUS
-
-        CPU_SIZE = 0.4
-        BUBBLE_TEXT_SIZE = 0.4
-
-        info = np.array([dict() for _ in range(N_CPUS)])
-
-        V_LINES = VGroup(
-            Line(
-                config.top + config.frame_width * LEFT / 2 + (MARGIN) * RIGHT,
-                config.bottom + config.frame_width * LEFT / 2 + (MARGIN) * RIGHT,
-            )
-        )
-
-        for _ in range(N_CPUS):
-            new_line = deepcopy(V_LINES.submobjects[-1])
-            V_LINES.add(new_line.shift(COL_SPACE * RIGHT))
-
-        def get_center_col(idx):
-            return VGroup(
-                V_LINES.submobjects[idx], V_LINES.submobjects[idx + 1]
-            ).get_center()
+        _, COL_CENTERS = get_columns_layout(len(CPU_BINS), MARGIN)
 
-        def get_center_margin():
-            return VGroup(
-                Line(_TOP + _LEFT, _BOTTOM + _LEFT), V_LINES.submobjects[0]
-            ).get_center()
+        self.info = np.array([dict() for _ in CPU_BINS])
 
-        cpu_mobj = get_cpu_mobj(CPU_SIZE)
-        imready_mobj = Text("I'm ready!").scale(BUBBLE_TEXT_SIZE)
+        imready_mobj = get_text("I'm ready!").scale(self.BUBBLE_TEXT_SIZE)
 
-        ready_cpu_group = VGroup()
-        ready_text_group = VGroup()
-        for cpu_idx in range(N_CPUS):
-            curr_cpu_mobj = get_cpu_mobj(CPU_SIZE, name=1 + cpu_idx * 8)
-            curr_cpu_mobj.move_to(get_center_col(cpu_idx))
+        self.ready_cpu_group = VGroup()
+        self.ready_text_group = VGroup()
+        for cpu_idx, (count, first_cpu) in enumerate(
+            zip(CPU_BINS, np.cumsum(CPU_BINS) - CPU_BINS)
+        ):
+            self.info[cpu_idx]["count"] = count
+            # A bin is named after the range of the CPUs it stands for
+            name = 1 + cpu_idx * 8
+            if count > 1:
+                name = f"{first_cpu + 1}-{first_cpu + count}"
+            curr_cpu_mobj = get_cpu_mobj(self.CPU_SIZE, name=name)
+            curr_cpu_mobj.move_to(COL_CENTERS[cpu_idx])
             curr_cpu_mobj.shift(_TOP + (MED_SMALL_BUFF + curr_cpu_mobj.height) * DOWN)
-            ready_cpu_group.add(curr_cpu_mobj)
+            curr_cpu_mobj = add_count_badge(curr_cpu_mobj, count)
+            self.ready_cpu_group.add(curr_cpu_mobj)
 
-            ready_text_group.add(
-                deepcopy(imready_mobj).next_to(curr_cpu_mobj, RIGHT + UP, SMALL_BUFF)
+            self.ready_text_group.add(
+                clone(imready_mobj).next_to(curr_cpu_mobj, RIGHT + UP, SMALL_BUFF)
             )
 
-        ready_cpu_zone = (
+        self.ready_cpu_zone = (
             RoundedRectangle(
                 width=0.90 * USABLE_WIDTH, height=config.frame_height / 3.5, color=GREY
             )
@@ -1093,192 +1693,214 @@ class TicketScheduler(Scene):
         )
 
         ready_cpu_zone_text = (
-            Text(" Ready\nthreads")
+            get_text(" Ready\nthreads")
             .scale(0.5)
-            .next_to(ready_cpu_zone, LEFT, 0)
+            .next_to(self.ready_cpu_zone, LEFT, 0)
             .shift(MARGIN * LEFT / 2)
         )
 
-        computing_zone = deepcopy(ready_cpu_zone)
-        computing_zone.set_fill(RED, 0.05)
-        computing_zone.color = RED
-        computing_zone.move_to(np.array([1, -1, 1]) * ready_cpu_zone.get_center())
+        self.computing_zone = clone(self.ready_cpu_zone)
+        self.computing_zone.set_fill(RED, 0.05)
+        self.computing_zone.color = RED
+        self.computing_zone.move_to(
+            np.array([1, -1, 1]) * self.ready_cpu_zone.get_center()
+        )
 
         computing_zone_text = (
-            Text("Locked\nthreads")
+            get_text("Locked\nthreads")
             .scale(0.5)
-            .next_to(computing_zone, LEFT, 0)
+            .next_to(self.computing_zone, LEFT, 0)
             .shift(MARGIN * LEFT / 2)
         )
 
-        now_serving_mobj = self.create_counter(
+        self.now_serving_mobj = self.create_counter(
             0.8 * MARGIN, 0.5 * MARGIN, BLUE, counter_text="Now serving"
         )
-        self.increment_counter(now_serving_mobj, 4)
+        self.now_serving_mobj.increment(4)
 
-        next_ticket_mobj = self.create_counter(
+        self.next_ticket_mobj = self.create_counter(
             0.8 * MARGIN, 0.5 * MARGIN, ORANGE, counter_text="Next ticket"
-        ).next_to(now_serving_mobj, DOWN, MED_SMALL_BUFF)
-        self.increment_counter(next_ticket_mobj, 5)
+        ).next_to(self.now_serving_mobj, DOWN, MED_SMALL_BUFF)
+        self.next_ticket_mobj.increment(5)
 
-        VGroup(now_serving_mobj, next_ticket_mobj).move_to(_LEFT + MARGIN * RIGHT / 2)
+        VGroup(self.now_serving_mobj, self.next_ticket_mobj).move_to(
+            _LEFT + MARGIN * RIGHT / 2
+        )
 
-        computing_cpu = get_cpu_mobj(CPU_SIZE, name=7)
-        computing_cpu.move_to(computing_zone)
+        self.computing_cpu = get_cpu_mobj(self.CPU_SIZE, name=7)
+        self.computing_cpu.move_to(self.computing_zone)
 
-        ivethelock = (
-            Text("I have the lock!")
-            .scale(BUBBLE_TEXT_SIZE)
+        self.ivethelock = (
+            get_text("I have the lock!")
+            .scale(self.BUBBLE_TEXT_SIZE)
             .next_to(
-                computing_cpu,
+                self.computing_cpu,
                 UP + RIGHT,
                 SMALL_BUFF,
             )
         )
 
         self.play(
-            FadeIn(ready_cpu_zone),
+            FadeIn(self.ready_cpu_zone),
             Write(ready_cpu_zone_text),
-            FadeIn(computing_zone),
+            FadeIn(self.computing_zone),
             Write(computing_zone_text),
-            Create(now_serving_mobj),
-            Create(next_ticket_mobj),
-            Create(computing_cpu),
+            Create(self.now_serving_mobj),
+            Create(self.next_ticket_mobj),
+            Create(self.computing_cpu),
         )
         self.wait()
-        self.play(Write(ivethelock))
+        self.play(Write(self.ivethelock))
         self.wait()
 
-        tickets_group = VGroup()
+        self.tickets_group = VGroup()
         for idx, (cpu, imready) in enumerate(
-            zip(ready_cpu_group.submobjects, ready_text_group)
+            zip(self.ready_cpu_group.submobjects, self.ready_text_group)
         ):
-            ticket = self.create_ticket(self.get_next_ticket_value(next_ticket_mobj))
-            info[idx]["cpu"] = cpu
-            info[idx]["ticket"] = ticket
-            info[idx]["imready"] = imready
+            count = self.info[idx]["count"]
+            ticket = self.create_ticket(self.next_ticket_mobj.get_value(), count=count)
+            self.info[idx]["cpu"] = cpu
+            self.info[idx]["ticket"] = ticket
+            self.info[idx]["imready"] = imready
             self.play(
                 Create(cpu),
                 Write(imready),
             )
             self.wait()
             self.play(
-                CounterGiveTicket(next_ticket_mobj, ticket, cpu),
-                IncrementCounter(next_ticket_mobj),
+                CounterGiveTicket(self.next_ticket_mobj, ticket, cpu),
+                IncrementCounter(self.next_ticket_mobj, count),
             )
             self.wait()
-            tickets_group.add(ticket)
+            self.tickets_group.add(ticket)
 
-        eyes_cpu_group = VGroup()
+    def show_waiting_queue(self):
+        self.eyes_cpu_group = VGroup()
         todo = []
         for idx, (cpu, imready) in enumerate(
-            zip(ready_cpu_group.submobjects, ready_text_group)
+            zip(self.ready_cpu_group.submobjects, self.ready_text_group)
         ):
             eyes_cpu = add_eyes_on_cpu(cpu)
-            info[idx]["eyes_cpu"] = eyes_cpu
-            eyes_cpu_group.add(eyes_cpu)
+            self.info[idx]["eyes_cpu"] = eyes_cpu
+            self.eyes_cpu_group.add(eyes_cpu)
             todo += [FadeOut(cpu), FadeIn(eyes_cpu), imready.animate.set_fill(RED, 1)]
 
         self.play(*todo)
         self.wait()
 
         self.play(
-            FadeOut(eyes_cpu_group),
-            FadeIn(ready_cpu_group),
-            ready_text_group.animate.set_fill(WHITE, 1),
+            FadeOut(self.eyes_cpu_group),
+            FadeIn(self.ready_cpu_group),
+            self.ready_text_group.animate.set_fill(WHITE, 1),
         )
         self.wait()
 
         _height_available = (
-            ready_cpu_zone.get_bottom() - computing_zone.get_top() - 2 * MED_LARGE_BUFF
+            self.ready_cpu_zone.get_bottom()
+            - self.computing_zone.get_top()
+            - 2 * MED_LARGE_BUFF
         )[1]
-        _length_queue = 5 * _height_available / 3
-        waiter_queue = WaitingQueue(5, _length_queue)
-        waiter_queue.mobj.next_to(ready_cpu_zone, DOWN, MED_LARGE_BUFF)
-        waiter_queue.set(4, "set_value", 4)
-        for idx in range(len(waiter_queue) - 1):
-            waiter_queue.set(idx, "set_value", idx)
-            waiter_queue.set(idx, "set_fill", GREY, 1)
-
-        local_now_serving_text = Text("Local\nNow\nServing")
-        local_now_serving_text.width = waiter_queue._hspace
-        local_now_serving_text.next_to(waiter_queue.mobj, RIGHT, SMALL_BUFF)
-
-        self.play(Create(waiter_queue.mobj), Write(local_now_serving_text))
+        # One slot per ticket up to the one now served, and one per column
+        self.queue_slots = max(5, len(self.ready_cpu_group))
+        self.length_queue = self.queue_slots * _height_available / 3
+        self.waiter_queue = WaitingQueue(
+            self.queue_slots,
+            self.length_queue,
+            default_values=[np.arange(self.queue_slots)],
+            default_colors=[np.where(np.arange(self.queue_slots) < 4, GREY, WHITE)],
+        )
+        self.waiter_queue.mobj.next_to(self.ready_cpu_zone, DOWN, MED_LARGE_BUFF)
+
+        self.local_now_serving_text = get_text("Local\nNow\nServing")
+        self.local_now_serving_text.width = self.waiter_queue._hspace
+        self.local_now_serving_text.next_to(self.waiter_queue.mobj, RIGHT, SMALL_BUFF)
+
+        self.play(Create(self.waiter_queue.mobj), Write(self.local_now_serving_text))
         self.wait()
 
+    def swap_delegation_queue(self):
+        n_columns = len(self.ready_cpu_group)
+
         down_cpus_group = VGroup()
-        for idx in range(N_CPUS):
-            direction = "right" if idx < N_CPUS / 2 else "left"
-            cpu = ready_cpu_group.submobjects[idx]
+        for idx in range(n_columns):
+            direction = "right" if idx < n_columns / 2 else "left"
+            cpu = self.ready_cpu_group.submobjects[idx]
             eyes_cpu = add_eyes_on_cpu(cpu, which="down", direction=direction)
             down_cpus_group.add(eyes_cpu)
 
             self.play(
-                Circumscribe(waiter_queue[idx]),
-                Circumscribe(ready_cpu_group.submobjects[idx]),
+                Circumscribe(self.waiter_queue[idx]),
+                Circumscribe(self.ready_cpu_group.submobjects[idx]),
                 FadeOut(cpu),
                 FadeIn(eyes_cpu),
             )
 
         self.wait()
 
-        default_values = np.full((3, 5), -1, dtype=np.int32)
-        default_values[0, :] = np.arange(5)
-        default_colors = np.c_[np.full((3, 4), GREY), np.full((3, 1), WHITE)]
-        delegation_queue = DelegatinQueue(
-            5,
-            _length_queue,
+        default_values = np.full((3, self.queue_slots), -1, dtype=np.int32)
+        default_values[0, :] = np.arange(self.queue_slots)
+        default_colors = np.tile(
+            np.where(np.arange(self.queue_slots) < 4, GREY, WHITE), (3, 1)
+        )
+        self.delegation_queue = DelegatinQueue(
+            self.queue_slots,
+            self.length_queue,
             default_values=default_values,
             default_colors=default_colors,
         )
-        delegation_queue.mobj.next_to(ready_cpu_zone, DOWN, MED_LARGE_BUFF)
+        self.delegation_queue.mobj.next_to(self.ready_cpu_zone, DOWN, MED_LARGE_BUFF)
 
         result_text = (
-            Text("Results")
-            .move_to(local_now_serving_text)
-            .shift(delegation_queue._hspace * DOWN)
+            get_text("Results")
+            .move_to(self.local_now_serving_text)
+            .shift(self.delegation_queue._hspace * DOWN)
         )
-        result_text.width = delegation_queue._hspace
+        result_text.width = self.delegation_queue._hspace
 
         request_text = (
-            Text("Requests").move_to(result_text).shift(delegation_queue._hspace * DOWN)
+            get_text("Requests")
+            .move_to(result_text)
+            .shift(self.delegation_queue._hspace * DOWN)
         )
-        request_text.width = delegation_queue._hspace
+        request_text.width = self.delegation_queue._hspace
 
-        delegation_text = VGroup(result_text, request_text)
+        self.delegation_text = VGroup(result_text, request_text)
 
         self.play(
-            Uncreate(waiter_queue.mobj),
+            Uncreate(self.waiter_queue.mobj),
         )
 
         self.play(
-            Write(delegation_text),
-            Create(delegation_queue.mobj),
+            Write(self.delegation_text),
+            Create(self.delegation_queue.mobj),
         )
 
-        delegation_text += local_now_serving_text
+        self.delegation_text += self.local_now_serving_text
 
-        for idx, (cpu, value) in enumerate(zip(eyes_cpu_group, (1, 9))):
-            value_to_change = delegation_queue[("request", idx)]
+    def delegate(self):
+        BUBBLE_TEXT_SIZE = self.BUBBLE_TEXT_SIZE
+        delegation_queue = self.delegation_queue
+        computing_cpu = self.computing_cpu
+
+        for idx, (cpu, value) in enumerate(zip(self.eyes_cpu_group, (1, 9))):
             self.play(
-                ChangeDecimalToValue(value_to_change, value),
-                Circumscribe(value_to_change),
+                *delegation_queue.change_values(
+                    {("request", idx): value}, circumscribe=True
+                ),
                 Circumscribe(cpu),
             )
 
         self.wait()
 
-        result_to_change = delegation_queue[("result", 0)]
         self.play(
-            ChangeDecimalToValue(result_to_change, 6), Circumscribe(result_to_change)
+            *delegation_queue.change_values({("result", 0): 6}, circumscribe=True)
         )
         self.wait()
 
-        self.play(ChangeDecimalToValue(result_to_change, -1))
+        self.play(*delegation_queue.change_values({("result", 0): -1}))
         self.wait()
 
-        byebye = Text("Finished, bye bye").scale(BUBBLE_TEXT_SIZE)
+        byebye = get_text("Finished, bye bye").scale(BUBBLE_TEXT_SIZE)
         byebye.next_to(computing_cpu, UP + RIGHT, SMALL_BUFF)
         byebye.generate_target()
         byebye.target.shift(10 * RIGHT)
@@ -1286,7 +1908,7 @@ class TicketScheduler(Scene):
         computing_cpu.generate_target()
         computing_cpu.target.shift(10 * RIGHT)
 
-        self.play(FadeOut(ivethelock), FadeIn(byebye))
+        self.play(FadeOut(self.ivethelock), FadeIn(byebye))
         self.play(
             MoveToTarget(computing_cpu),
             MoveToTarget(byebye),
@@ -1294,40 +1916,100 @@ class TicketScheduler(Scene):
         self.wait()
 
         self.play(
-            *IncrementCounter(now_serving_mobj, circumscribe=True),
-            ChangeDecimalToValue(delegation_queue[("now_serving", 0)], 5),
+            *IncrementCounter(self.now_serving_mobj, circumscribe=True),
+            *delegation_queue.change_values({("now_serving", 0): 5}),
         )
         self.wait()
 
-        now_computing_cpu = info[0]["eyes_cpu"]
+        now_computing_cpu = self.info[0]["eyes_cpu"]
 
         noresult = (
-            Text("No result?")
+            get_text("No result?")
             .scale(BUBBLE_TEXT_SIZE)
             .next_to(now_computing_cpu.get_corner(UP + RIGHT), UP + RIGHT, SMALL_BUFF)
         )
 
         myturnthen = (
-            Text("My turn then...")
+            get_text("My turn then...")
             .scale(BUBBLE_TEXT_SIZE)
             .next_to(now_computing_cpu.get_corner(UP + RIGHT), UP + RIGHT, SMALL_BUFF)
         )
 
         now_computing_cpu.generate_target()
-        now_computing_cpu.target.move_to(computing_zone)
+        now_computing_cpu.target.move_to(self.computing_zone)
 
-        self.play(Unwrite(info[0]["imready"]))
+        self.play(Unwrite(self.info[0]["imready"]))
         self.play(Write(noresult))
         self.play(Unwrite(noresult))
         self.play(Write(myturnthen))
 
         # self.play(
         #     Unwrite(myturnthen),
-        #     Uncreate(info[0]["ticket"]),
+        #     Uncreate(self.info[0]["ticket"]),
         #     MoveToTarget(now_computing_cpu),
         # )
         self.wait()
 
+    def replay_trace(self):
+        """Replays a window of the simulated lock through the delegation queue
+        and the counters, the changes of successive events being played
+        together as long as they touch different cells."""
+        # One thread per slot shown, so that no two tickets share a cell
+        simulation = simulate_lock(
+            self.TRACE_DESIGN,
+            min(self.N_CPUS, self.queue_slots),
+            until=self.TRACE_WINDOW[1],
+            slots=self.queue_slots,
+            window=self.TRACE_WINDOW,
+        )
+        state = simulation["state"]
+
+        keep = [
+            self.now_serving_mobj,
+            self.next_ticket_mobj,
+            self.delegation_queue.mobj,
+            self.delegation_text,
+        ]
+        keep_family = {id(mobj) for group in keep for mobj in group.get_family()}
+        to_remove = [mobj for mobj in self.mobjects if id(mobj) not in keep_family]
+        if to_remove:
+            self.play(*map(FadeOut, to_remove))
+
+        changes = {
+            (row, idx): value
+            for row in QUEUE_ROWS
+            for idx, value in enumerate(state[row])
+        }
+        changes.update(
+            now_serving=state["now_serving_counter"], next_ticket=state["next_ticket"]
+        )
+        self.play_trace_changes(changes)
+        self.wait()
+
+        changes = {}
+        for event in simulation["trace"][: self.TRACE_MAX_EVENTS]:
+            event_changes = get_trace_changes(event)
+            if any(key in changes for key in event_changes):
+                self.play_trace_changes(changes)
+                changes = {}
+            changes.update(event_changes)
+        self.play_trace_changes(changes)
+        self.wait()
+
+    def play_trace_changes(self, changes):
+        animations = self.delegation_queue.change_values(
+            {key: value for key, value in changes.items() if isinstance(key, tuple)}
+        )
+        counters = {
+            "now_serving": self.now_serving_mobj,
+            "next_ticket": self.next_ticket_mobj,
+        }
+        animations += ChangeCounters(
+            {counters[key]: value for key, value in changes.items() if key in counters}
+        )
+        if animations:
+            self.play(*animations)
+
 
 class ThanksForWatching(Scene):
     def construct(self):
@@ -1338,14 +2020,14 @@ class ThanksForWatching(Scene):
         cpu_mobj = get_cpu_mobj(1.5)
         cpu_mobj = add_eyes_on_cpu(cpu_mobj, "happy")
 
-        thanks = Text(
+        thanks = get_text(
             "Thanks for watching!", t2w={"world": BOLD}, gradient=(WHITE, BLUE)
         ).next_to(cpu_mobj, UP, MED_LARGE_BUFF)
 
         self.play(Create(cpu_mobj), Write(thanks))
 
         link = (
-            Text("https://github.com/RomainGrx/LINGI2355-Exam-video", color=BLUE)
+            get_text("https://github.com/RomainGrx/LINGI2355-Exam-video", color=BLUE)
             .scale(0.45)
             .next_to(cpu_mobj, DOWN, MED_LARGE_BUFF)
         )
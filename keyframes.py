@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Keyframes of the scenes of ingi2355_exam_video.py, to review their layout
+without rendering the videos.
+
+Only the last frame of each play of a scene is rasterized, the animations
+being run straight to their end as when manim skips them. The keyframes are
+saved as PNGs in media/keyframes/<Scene>/, named after the index of the play
+and the segment hash of video_renderer.VideoRenderer, so that the keyframes
+of the plays whose segment didn't change since the last run are not
+rasterized again. Each scene also gets a contact sheet of all its keyframes,
+media/keyframes/<Scene>.png. The scenes are run in parallel, one process
+per scene.
+
+    python keyframes.py
+    python keyframes.py ASMStates SchedulerWaitFree TicketScheduler -j 3
+"""
+
+import argparse
+import importlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from manim import *
+from PIL import Image, ImageDraw
+
+from render import (
+    MODULE_NAME,
+    QUALITY_FLAGS,
+    get_available_cores,
+    get_render_config,
+    get_scenes,
+)
+from video_renderer import VideoRenderer
+
+KEYFRAME_DIR = os.path.join(config.media_dir, "keyframes")
+LABEL_HEIGHT = 16
+
+
+class KeyframeRenderer(VideoRenderer):
+    """Renderer that skips every play, and only rasterizes the scene at the
+    end of the plays whose keyframe is not saved yet."""
+
+    def __init__(self, keyframe_dir, **kwargs):
+        VideoRenderer.__init__(self, skip_animations=True, **kwargs)
+        self.keyframe_dir = keyframe_dir
+        self.keyframes = []
+        self.num_rasterized = 0
+
+    def save_keyframe(self, scene, key):
+        path = os.path.join(self.keyframe_dir, f"{self.num_plays:04}_{key[:16]}.png")
+        if not os.path.exists(path):
+            self.static_image = None
+            self.update_frame(scene)
+            self.camera.get_image().save(path)
+            self.num_rasterized += 1
+        self.keyframes.append(path)
+
+    def play(self, scene, *args, **kwargs):
+        scene.compile_animation_data(*args, **kwargs)
+        key = self.get_segment_hash(scene)
+        scene.begin_animations()
+        # Nothing changes during a static wait, there is no keyframe to save
+        if not scene.is_current_animation_frozen_frame():
+            scene.play_internal()
+            self.save_keyframe(scene, key)
+        self.num_plays += 1
+
+
+def make_contact_sheet(paths, output, columns, width):
+    """Grid of the keyframes ``paths``, each scaled to ``width`` pixels and
+    labelled with the index of its play."""
+    thumbnails = []
+    for path in paths:
+        with Image.open(path) as image:
+            height = round(image.height * width / image.width)
+            thumbnails.append(image.convert("RGB").resize((width, height)))
+    cell_height = max(thumbnail.height for thumbnail in thumbnails) + LABEL_HEIGHT
+    rows = (len(thumbnails) + columns - 1) // columns
+
+    sheet = Image.new("RGB", (columns * width, rows * cell_height))
+    draw = ImageDraw.Draw(sheet)
+    for idx, (path, thumbnail) in enumerate(zip(paths, thumbnails)):
+        x, y = (idx % columns) * width, (idx // columns) * cell_height
+        sheet.paste(thumbnail, (x, y + LABEL_HEIGHT))
+        play = os.path.basename(path).split("_")[0]
+        draw.text((x + 4, y + 2), f"play {int(play)}", fill="white")
+    sheet.save(output)
+    return output
+
+
+def export_keyframes(scene_name, render_config, columns, width):
+    module = importlib.import_module(MODULE_NAME)
+    keyframe_dir = os.path.join(KEYFRAME_DIR, scene_name)
+    os.makedirs(keyframe_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    with tempconfig(render_config):
+        renderer = KeyframeRenderer(keyframe_dir)
+        scene = getattr(module, scene_name)(renderer=renderer)
+        scene.render()
+        module.log_text_cache_stats()
+
+    # Keyframes of the previous runs that are not part of the scene anymore
+    for file_name in os.listdir(keyframe_dir):
+        path = os.path.join(keyframe_dir, file_name)
+        if path not in renderer.keyframes:
+            os.remove(path)
+
+    sheet = None
+    if renderer.keyframes:
+        sheet = make_contact_sheet(
+            renderer.keyframes,
+            os.path.join(KEYFRAME_DIR, f"{scene_name}.png"),
+            columns,
+            width,
+        )
+    return {
+        "keyframes": len(renderer.keyframes),
+        "rasterized": renderer.num_rasterized,
+        "sheet": sheet,
+        "time": time.perf_counter() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "scenes", nargs="*", help="Scenes to export (all the scenes by default)"
+    )
+    parser.add_argument(
+        "-q",
+        "--quality",
+        choices=QUALITY_FLAGS,
+        default="l",
+        help="Resolution of the keyframes, as for manim -q (default: l)",
+    )
+    parser.add_argument(
+        "-j",
+        "--processes",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: available cores)",
+    )
+    parser.add_argument(
+        "--columns", type=int, default=6, help="Keyframes per row of the sheets"
+    )
+    parser.add_argument(
+        "--width", type=int, default=320, help="Width of the keyframes in the sheets"
+    )
+    args = parser.parse_args()
+
+    module = importlib.import_module(MODULE_NAME)
+    scene_names = args.scenes or [cls.__name__ for cls in get_scenes(module)]
+    render_config = get_render_config(QUALITY_FLAGS[args.quality])
+    render_config.update(write_to_movie=False)
+
+    processes = min(args.processes or get_available_cores(), len(scene_names))
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = {
+            scene_name: executor.submit(
+                export_keyframes, scene_name, render_config, args.columns, args.width
+            )
+            for scene_name in scene_names
+        }
+        for scene_name, future in futures.items():
+            result = future.result()
+            print(
+                f"{scene_name:>20} {result['keyframes']:>4} keyframes "
+                f"({result['rasterized']} rasterized) {result['time']:>7.2f}s  "
+                f"{result['sheet']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-play profiler for the scenes of ingi2355_exam_video.py.
+
+Every play/wait of the profiled scenes is recorded with the animations it
+runs, the number of mobjects and points it updates per frame, and the time
+spent interpolating the animations, rasterizing the frames and writing them
+to ffmpeg. The plays are printed sorted by one of these times, along with the
+totals per animation type, and saved as a Chrome trace (chrome://tracing or
+https://ui.perfetto.dev).
+
+    python profiler.py TicketScheduler ASMStates --sort rendering
+"""
+
+import argparse
+import importlib
+import json
+import os
+import time
+from collections import defaultdict
+
+from manim import *
+
+from render import MODULE_NAME, QUALITY_FLAGS, get_render_config, get_scenes
+from video_renderer import VideoRenderer
+
+PHASES = ("interpolation", "rendering", "writing")
+SORT_KEYS = ("total",) + PHASES + ("frames", "points")
+
+
+class ProfilingRenderer(VideoRenderer):
+    """VideoRenderer that records what each play runs and where its time goes."""
+
+    def __init__(self, **kwargs):
+        VideoRenderer.__init__(self, **kwargs)
+        self.plays = []
+        self.current_play = None
+        self.update_frame = self.timed("rendering", self.update_frame)
+        self.get_frame = self.timed("rendering", self.get_frame)
+        # The static layers are rasterized and composited outside update_frame
+        for name in ("rasterize_background", "rasterize_overlay", "composite_overlay"):
+            setattr(self, name, self.timed("rendering", getattr(self, name)))
+        self.add_frame = self.timed("writing", self.add_frame)
+
+    def timed(self, phase, function):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                if self.current_play is not None:
+                    self.current_play[phase] += time.perf_counter() - start
+
+        return wrapper
+
+    def play(self, scene, *args, **kwargs):
+        self.current_play = dict.fromkeys(PHASES, 0.0)
+        frames = self.time * config["frame_rate"]
+        start = time.perf_counter()
+        # Instance attribute for the duration of the play only, so that it
+        # never ends up in a checkpoint of the scene
+        scene.update_to_time = self.timed("interpolation", scene.update_to_time)
+        try:
+            VideoRenderer.play(self, scene, *args, **kwargs)
+        finally:
+            del scene.update_to_time
+        end = time.perf_counter()
+
+        moving_family = [
+            member
+            for mobj in scene.moving_mobjects or scene.mobjects
+            for member in mobj.get_family()
+        ]
+        play = self.current_play
+        self.current_play = None
+        play.update(
+            index=self.num_plays - 1,
+            scene=scene.__class__.__name__,
+            animations=[type(animation).__name__ for animation in scene.animations],
+            description=", ".join(str(animation) for animation in scene.animations),
+            cached=self.skip_animations,
+            frames=int(round(self.time * config["frame_rate"] - frames)),
+            mobjects=len(moving_family),
+            points=sum(len(mobj.points) for mobj in moving_family),
+            start=start,
+            total=end - start,
+        )
+        self.plays.append(play)
+
+
+def profile_scene(module, scene_name, render_config):
+    with tempconfig(render_config):
+        renderer = ProfilingRenderer()
+        scene = getattr(module, scene_name)(renderer=renderer)
+        scene.render()
+    return renderer.plays
+
+
+def get_chrome_trace(plays):
+    """Chrome trace events: one complete event per play (one thread per scene)
+    and counters for the mobjects and points it updates per frame."""
+    origin = min((play["start"] for play in plays), default=0)
+    scene_tids = {}
+    events = []
+    for play in plays:
+        tid = scene_tids.setdefault(play["scene"], len(scene_tids) + 1)
+        ts = 1e6 * (play["start"] - origin)
+        events.append(
+            {
+                "name": " + ".join(play["animations"]),
+                "cat": play["scene"],
+                "ph": "X",
+                "ts": ts,
+                "dur": 1e6 * play["total"],
+                "pid": 1,
+                "tid": tid,
+                "args": {
+                    key: play[key]
+                    for key in (
+                        "index",
+                        "description",
+                        "cached",
+                        "frames",
+                        "mobjects",
+                        "points",
+                    )
+                    + PHASES
+                },
+            }
+        )
+        events.append(
+            {
+                "name": f"{play['scene']} per frame",
+                "ph": "C",
+                "ts": ts,
+                "pid": 1,
+                "args": {"mobjects": play["mobjects"], "points": play["points"]},
+            }
+        )
+    for scene_name, tid in scene_tids.items():
+        events.append(
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": 1,
+                "tid": tid,
+                "args": {"name": scene_name},
+            }
+        )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def print_report(plays, sort_key, limit):
+    print(
+        f"{'scene':>20} {'play':>5} {'total':>8} {'interp':>8} {'render':>8} "
+        f"{'write':>8} {'frames':>7} {'mobjs':>6} {'points':>8}  animations"
+    )
+    for play in sorted(plays, key=lambda play: play[sort_key], reverse=True)[:limit]:
+        print(
+            f"{play['scene']:>20} {play['index']:>5} {play['total']:>8.3f} "
+            f"{play['interpolation']:>8.3f} {play['rendering']:>8.3f} "
+            f"{play['writing']:>8.3f} {play['frames']:>7} {play['mobjects']:>6} "
+            f"{play['points']:>8}  {play['description'][:80]}"
+        )
+
+    by_animation = defaultdict(lambda: defaultdict(float))
+    for play in plays:
+        # The time of a play is shared evenly between its animations
+        for animation in play["animations"]:
+            totals = by_animation[animation]
+            totals["plays"] += 1
+            for key in ("total",) + PHASES:
+                totals[key] += play[key] / len(play["animations"])
+
+    print()
+    print(
+        f"{'animation':>24} {'plays':>6} {'total':>8} {'interp':>8} "
+        f"{'render':>8} {'write':>8}"
+    )
+    for animation, totals in sorted(
+        by_animation.items(), key=lambda item: item[1]["total"], reverse=True
+    ):
+        print(
+            f"{animation:>24} {int(totals['plays']):>6} {totals['total']:>8.3f} "
+            f"{totals['interpolation']:>8.3f} {totals['rendering']:>8.3f} "
+            f"{totals['writing']:>8.3f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "scenes", nargs="*", help="Scenes to profile (all the scenes by default)"
+    )
+    parser.add_argument(
+        "-q",
+        "--quality",
+        choices=QUALITY_FLAGS,
+        default="l",
+        help="Render quality, as for manim -q (default: l)",
+    )
+    parser.add_argument(
+        "--sort",
+        choices=SORT_KEYS,
+        default="total",
+        help="Column the plays are sorted by (default: total)",
+    )
+    parser.add_argument(
+        "-n", "--limit", type=int, default=30, help="Number of plays to print"
+    )
+    parser.add_argument(
+        "--trace",
+        default=os.path.join(config.media_dir, "profile_trace.json"),
+        help="Path of the Chrome trace",
+    )
+    parser.add_argument(
+        "--use-cache",
+        action="store_true",
+        help="Reuse the cached segments instead of rendering every play",
+    )
+    args = parser.parse_args()
+
+    module = importlib.import_module(MODULE_NAME)
+    scene_names = args.scenes or [cls.__name__ for cls in get_scenes(module)]
+    render_config = get_render_config(QUALITY_FLAGS[args.quality])
+    render_config.update(disable_caching=not args.use_cache)
+
+    plays = []
+    for scene_name in scene_names:
+        plays.extend(profile_scene(module, scene_name, render_config))
+
+    print_report(plays, args.sort, args.limit)
+    os.makedirs(os.path.dirname(os.path.abspath(args.trace)), exist_ok=True)
+    with open(args.trace, "w") as fp:
+        json.dump(get_chrome_trace(plays), fp)
+    logger.info(f"Chrome trace written to {args.trace}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Render driver for the whole video.
+
+Every Scene of ingi2355_exam_video.py is rendered in its own process, then
+the scene videos are joined, in order, without re-encoding. Scene videos are
+cached by a hash of the code and assets they depend on, so only the scenes
+affected by an edit are rendered again. Inside a scene, the plays that come
+before the first edited one are reused from the segment cache of
+video_renderer.VideoRenderer.
+
+    python render.py -qh
+    python render.py -ql TicketScheduler ASMStates
+    python render.py --draft 5 SchedulerWaitFree
+    python render.py -qh --split TicketScheduler
+"""
+
+import argparse
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+from manim import *
+from manim import __version__ as manim_version
+
+import dependencies
+import video_renderer
+from dependencies import get_dependencies, update_digest
+from video_renderer import SplitRenderer, VideoRenderer
+
+MODULE_NAME = "ingi2355_exam_video"
+MODULE_FILE = f"{MODULE_NAME}.py"
+SCENE_CACHE_DIR = os.path.join(config.media_dir, "cache", "scenes")
+
+QUALITY_FLAGS = {
+    quality["flag"]: name for name, quality in QUALITIES.items() if quality["flag"]
+}
+# Resolution of the draft previews, about a third of the pixels of -ql
+DRAFT_CONFIG = {"pixel_height": 270, "pixel_width": 480, "frame_rate": 15}
+
+
+def get_scenes(module):
+    """Scene classes defined in ``module``, in the order of the source file,
+    without the base classes of the other scenes (e.g. SectionedScene) nor
+    the ones with no construct of their own (e.g. EvictingScene)."""
+    classes = [
+        cls
+        for _, cls in inspect.getmembers(module, inspect.isclass)
+        if issubclass(cls, Scene) and cls.__module__ == module.__name__
+    ]
+    bases = {base for cls in classes for base in cls.__mro__[1:]}
+    scenes = [
+        cls
+        for cls in classes
+        if cls not in bases and cls.construct is not Scene.construct
+    ]
+    return sorted(scenes, key=lambda cls: inspect.getsourcelines(cls)[1])
+
+
+def get_scene_key(module, scene_cls, render_config, draft_step=1):
+    """Hash of everything the video of ``scene_cls`` depends on."""
+    digest = hashlib.sha1(manim_version.encode())
+    # How the frames are drawn and encoded, and how the keys are computed
+    for renderer_module in (video_renderer, dependencies):
+        digest.update(inspect.getsource(renderer_module).encode())
+    update_digest(digest, module, get_dependencies(module, scene_cls, cls=scene_cls))
+    digest.update(json.dumps(render_config, sort_keys=True).encode())
+    if draft_step > 1:
+        digest.update(f"draft_{draft_step}".encode())
+    return digest.hexdigest()
+
+
+def get_cached_video_path(scene_name, key):
+    return os.path.join(SCENE_CACHE_DIR, f"{scene_name}_{key}.mp4")
+
+
+def get_render_config(quality):
+    render_config = {
+        key: QUALITIES[quality][key]
+        for key in ("pixel_height", "pixel_width", "frame_rate")
+    }
+    render_config.update(input_file=MODULE_FILE, progress_bar="none")
+    return render_config
+
+
+def get_available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def render_scene(
+    scene_name,
+    render_config,
+    checkpoint=None,
+    streaming=False,
+    draft_step=1,
+    split_processes=None,
+):
+    module = importlib.import_module(MODULE_NAME)
+    with tempconfig(render_config):
+        if split_processes:
+            renderer = SplitRenderer(
+                split_processes, checkpoint=checkpoint, draft_step=draft_step
+            )
+            scene = getattr(module, scene_name)(renderer=renderer)
+            renderer.render_scene(scene)
+        else:
+            renderer = VideoRenderer(
+                checkpoint=checkpoint, streaming=streaming, draft_step=draft_step
+            )
+            scene = getattr(module, scene_name)(renderer=renderer)
+            scene.render()
+        module.log_text_cache_stats()
+        movie_file_path = scene.renderer.file_writer.movie_file_path
+        if not os.path.exists(movie_file_path):
+            raise RuntimeError(f"{scene_name} : No video was written")
+        return movie_file_path
+
+
+def render_scenes(
+    scene_names,
+    render_config,
+    processes=None,
+    use_cache=True,
+    checkpoint=None,
+    streaming=False,
+    draft_step=1,
+    split=False,
+):
+    module = importlib.import_module(MODULE_NAME)
+    videos = {}
+    keys = {}
+    for scene_name in scene_names:
+        keys[scene_name] = get_scene_key(
+            module, getattr(module, scene_name), render_config, draft_step
+        )
+        cached_video = get_cached_video_path(scene_name, keys[scene_name])
+        if use_cache and os.path.exists(cached_video):
+            logger.info(f"{scene_name} : Using cached video {cached_video}")
+            videos[scene_name] = cached_video
+
+    to_render = [name for name in scene_names if name not in videos]
+    if to_render and split:
+        # One scene at a time, each split between all the processes
+        os.makedirs(SCENE_CACHE_DIR, exist_ok=True)
+        for scene_name in to_render:
+            video = render_scene(
+                scene_name,
+                render_config,
+                checkpoint,
+                draft_step=draft_step,
+                split_processes=processes or get_available_cores(),
+            )
+            cached_video = get_cached_video_path(scene_name, keys[scene_name])
+            shutil.copyfile(video, cached_video)
+            videos[scene_name] = cached_video
+    elif to_render:
+        processes = min(processes or get_available_cores(), len(to_render))
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = {
+                scene_name: executor.submit(
+                    render_scene,
+                    scene_name,
+                    render_config,
+                    checkpoint,
+                    streaming,
+                    draft_step,
+                )
+                for scene_name in to_render
+            }
+            os.makedirs(SCENE_CACHE_DIR, exist_ok=True)
+            for scene_name, future in futures.items():
+                cached_video = get_cached_video_path(scene_name, keys[scene_name])
+                shutil.copyfile(future.result(), cached_video)
+                videos[scene_name] = cached_video
+
+    return [videos[scene_name] for scene_name in scene_names]
+
+
+def concat_videos(videos, output):
+    """Join ``videos`` into ``output`` with ffmpeg's concat demuxer (stream copy)."""
+    file_list = f"{os.path.splitext(output)[0]}_file_list.txt"
+    with open(file_list, "w") as fp:
+        for video in videos:
+            fp.write(f"file 'file:{os.path.abspath(video)}'\n")
+
+    subprocess.run(
+        [
+            FFMPEG_BIN,
+            "-y",
+            "-f",
+            "concat",
+            "-safe",
+            "0",
+            "-i",
+            file_list,
+            "-c",
+            "copy",
+            "-loglevel",
+            "error",
+            "-nostdin",
+            output,
+        ],
+        check=True,
+    )
+    os.remove(file_list)
+    return output
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "scenes", nargs="*", help="Scenes to render (all the scenes by default)"
+    )
+    parser.add_argument(
+        "-q",
+        "--quality",
+        choices=QUALITY_FLAGS,
+        default="l",
+        help="Render quality, as for manim -q (default: l)",
+    )
+    parser.add_argument(
+        "-j",
+        "--processes",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: available cores)",
+    )
+    parser.add_argument("-o", "--output", default=None, help="Path of the joined video")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Render every scene, even the ones whose video is cached",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=None,
+        help="Section of the scenes to start from (default: latest valid checkpoint)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Encode each scene with a single ffmpeg process, without segment cache",
+    )
+    parser.add_argument(
+        "--draft",
+        type=int,
+        nargs="?",
+        const=5,
+        default=None,
+        metavar="N",
+        help="Low resolution preview drawing one frame out of N (default: 5), "
+        "without decorative animations",
+    )
+    parser.add_argument(
+        "--split",
+        action="store_true",
+        help="Render the scenes one after the other, splitting the plays of "
+        "each one between the processes",
+    )
+    return parser
+
+
+def main():
+    parser = get_parser()
+    args = parser.parse_args()
+    if args.split and args.stream:
+        parser.error("--split writes every segment on its own, unlike --stream")
+
+    module = importlib.import_module(MODULE_NAME)
+    scene_names = args.scenes or [cls.__name__ for cls in get_scenes(module)]
+    render_config = get_render_config(QUALITY_FLAGS[args.quality])
+    if args.draft:
+        render_config.update(DRAFT_CONFIG)
+
+    videos = render_scenes(
+        scene_names,
+        render_config,
+        args.processes,
+        use_cache=not args.no_cache,
+        checkpoint=args.checkpoint,
+        streaming=args.stream,
+        draft_step=args.draft or 1,
+        split=args.split,
+    )
+
+    if args.output:
+        output = args.output
+    else:
+        with tempconfig(render_config):
+            video_dir = config.get_dir("video_dir", module_name=MODULE_NAME)
+        os.makedirs(video_dir, exist_ok=True)
+        output = os.path.join(video_dir, f"{MODULE_NAME}.mp4")
+    concat_videos(videos, output)
+    logger.info(f"Video ready at {output}")
+
+
+if __name__ == "__main__":
+    main()
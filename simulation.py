@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Simulators of the locks shown in TicketScheduler and of the DataAccess
+flags shown in ASMStates.
+
+Each thread loops on: take a ticket, wait for its turn, run a critical
+section, then think for a while. Three designs of the lock are simulated:
+
+- ``ticket``: every waiter spins on the global now serving counter, so that
+  each hand-off gets slower as the number of waiters grows,
+- ``local``: each waiter spins on the slot of its ticket in the local now
+  serving waiting queue, so that a hand-off only disturbs the waiters of
+  the slot it writes, a single one unless there are fewer slots than
+  threads,
+- ``delegation``: waiters post their request in their slot of the delegation
+  queue, and the lock holder runs the pending requests for them, writing
+  their result back, before handing the lock off.
+
+The events are processed in time order from a heap. Besides the statistics
+of the run, the events of a time window are recorded, along with the state
+of the queue rows at its start, for TicketScheduler to replay them.
+
+The flags of the DataAccess objects are simulated by steps instead, on a
+packed array of millions of flag words, applying the transitions of the
+atomic state machine and their actions as bitwise operations on the whole
+array.
+
+    python simulation.py lock --threads 2 8 64 --until 100000
+    python simulation.py asm --accesses 1000000 --steps 60
+"""
+
+import argparse
+import heapq
+import time
+from collections import namedtuple
+
+import numpy as np
+
+LOCK_DESIGNS = ("ticket", "local", "delegation")
+QUEUE_ROWS = ("now_serving", "result", "request")
+
+# Kinds of the events of the heap
+ARRIVE, ACQUIRE, RELEASE, SERVE = range(4)
+# Number of random values drawn at once by get_random_stream
+RANDOM_BATCH = 1 << 16
+
+TraceEvent = namedtuple("TraceEvent", "time kind thread ticket slot value")
+
+
+def get_random_stream(draw, batch=RANDOM_BATCH):
+    """Endless iterator over the values of ``draw(batch)``, drawn by NumPy one
+    batch at a time rather than one value at a time by the event loop."""
+    while True:
+        yield from draw(batch).tolist()
+
+
+def simulate_lock(
+    design,
+    n_threads,
+    until,
+    slots=None,
+    cs_time=1.0,
+    think_time=4.0,
+    handoff_time=0.2,
+    spin_time=0.05,
+    combine_limit=None,
+    window=None,
+    seed=0,
+):
+    """Runs ``n_threads`` threads on a lock of the given ``design`` for
+    ``until`` time units, with a waiting queue of ``slots`` slots (one per
+    thread by default).
+
+    Returns a dict with the ``stats`` of the run, the ``trace`` of the events
+    of the time ``window`` (start, end) and the ``state`` of the queue rows
+    and counters at the start of the window."""
+    if design not in LOCK_DESIGNS:
+        raise ValueError(
+            f"Unknown lock design {design!r}, expected one of {LOCK_DESIGNS}"
+        )
+    slots = slots or n_threads
+    combine_limit = n_threads if combine_limit is None else combine_limit
+    window_start, window_end = window or (until, until)
+
+    rng = np.random.default_rng(seed)
+    next_think_time = get_random_stream(
+        lambda size: rng.exponential(think_time, size)
+    ).__next__
+    next_request = get_random_stream(lambda size: rng.integers(1, 10, size)).__next__
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+
+    rows = {
+        "now_serving": np.arange(slots),
+        "result": np.full(slots, -1),
+        "request": np.full(slots, -1),
+    }
+    now_serving = next_ticket = 0
+    # Ticket -> (thread, arrival time, request) of the threads waiting
+    waiting = {}
+    # Number of waiters spinning on each slot of the local now serving queue
+    spinning = [0] * slots
+    # Requests run by the current lock holder on behalf of the waiters
+    combined = 0
+    accumulator = 0
+
+    completed = delegated = handoffs = n_events = 0
+    total_wait = max_wait = 0.0
+    trace = []
+    state = None
+
+    events = [
+        (next_think_time(), thread, ARRIVE, thread, -1) for thread in range(n_threads)
+    ]
+    heapq.heapify(events)
+    seq = n_threads
+
+    start = time.perf_counter()
+    while events:
+        now, _, kind, thread, ticket = heappop(events)
+        if now > until:
+            break
+        n_events += 1
+        if state is None and now >= window_start:
+            state = {row: values.copy() for row, values in rows.items()}
+            state.update(now_serving_counter=now_serving, next_ticket=next_ticket)
+        recording = window_start <= now < window_end
+
+        if kind == ARRIVE:
+            ticket = next_ticket
+            next_ticket += 1
+            slot = ticket % slots
+            request = next_request()
+            waiting[ticket] = (thread, now, request)
+            spinning[slot] += 1
+            if recording:
+                trace.append(
+                    TraceEvent(now, "ticket", thread, ticket, slot, next_ticket)
+                )
+            if ticket == now_serving:
+                heappush(events, (now, seq, ACQUIRE, thread, ticket))
+                seq += 1
+            elif design == "delegation":
+                rows["request"][slot] = request
+                if recording:
+                    trace.append(
+                        TraceEvent(now, "request", thread, ticket, slot, request)
+                    )
+            continue
+
+        if kind == ACQUIRE:
+            _, arrival, _ = waiting.pop(ticket)
+            spinning[ticket % slots] -= 1
+            wait = now - arrival
+            total_wait += wait
+            max_wait = max(max_wait, wait)
+            combined = 0
+            if recording:
+                trace.append(
+                    TraceEvent(now, "acquire", thread, ticket, ticket % slots, ticket)
+                )
+            heappush(events, (now + cs_time, seq, RELEASE, thread, ticket))
+            seq += 1
+            continue
+
+        if kind == SERVE:
+            # The lock holder ran the request of ``ticket`` for its waiter
+            waiter, arrival, request = waiting.pop(ticket)
+            spinning[ticket % slots] -= 1
+            wait = now - arrival
+            total_wait += wait
+            max_wait = max(max_wait, wait)
+            delegated += 1
+            accumulator += request
+            slot = ticket % slots
+            rows["result"][slot] = rows["request"][slot] = -1
+            if recording:
+                trace.append(
+                    TraceEvent(now, "result", thread, ticket, slot, accumulator)
+                )
+                trace.append(TraceEvent(now, "consume", waiter, ticket, slot, -1))
+            heappush(events, (now + next_think_time(), seq, ARRIVE, waiter, -1))
+            seq += 1
+
+        # The critical section of ``ticket`` is over (RELEASE or SERVE)
+        completed += 1
+        successor = ticket + 1
+        if design == "delegation" and combined < combine_limit and successor in waiting:
+            combined += 1
+            heappush(events, (now + cs_time, seq, SERVE, thread, successor))
+            seq += 1
+            continue
+
+        now_serving = successor
+        slot = successor % slots
+        rows["now_serving"][slot] = successor
+        if recording:
+            trace.append(TraceEvent(now, "release", thread, ticket, slot, successor))
+        if successor in waiting:
+            latency = handoff_time
+            if design == "ticket":
+                latency += spin_time * len(waiting)
+            elif design == "local":
+                latency += spin_time * spinning[slot]
+            heappush(
+                events, (now + latency, seq, ACQUIRE, waiting[successor][0], successor)
+            )
+            handoffs += 1
+            seq += 1
+        heappush(events, (now + next_think_time(), seq, ARRIVE, thread, -1))
+        seq += 1
+    elapsed = time.perf_counter() - start
+
+    if state is None:
+        state = {row: values.copy() for row, values in rows.items()}
+        state.update(now_serving_counter=now_serving, next_ticket=next_ticket)
+
+    served = completed or 1
+    stats = {
+        "design": design,
+        "threads": n_threads,
+        "completed": completed,
+        "delegated": delegated,
+        "handoffs": handoffs,
+        "throughput": completed / until,
+        "mean_wait": total_wait / served,
+        "max_wait": max_wait,
+        "events": n_events,
+        "events_per_second": n_events / elapsed if elapsed else 0.0,
+    }
+    return {"stats": stats, "trace": trace, "state": state}
+
+
+def get_trace_changes(event):
+    """Values the trace ``event`` gives to the cells of the delegation queue,
+    keyed by (row, slot), and to the counters, keyed by their name."""
+    if event.kind == "ticket":
+        return {"next_ticket": event.value}
+    if event.kind == "request":
+        return {("request", event.slot): event.value}
+    if event.kind == "result":
+        return {("result", event.slot): event.value}
+    if event.kind == "consume":
+        return {("result", event.slot): -1, ("request", event.slot): -1}
+    if event.kind == "release":
+        return {("now_serving", event.slot): event.value, "now_serving": event.value}
+    return {}
+
+
+# Bits of the flags of a DataAccess, in the order ASMStates sets them
+READ_SATISFIED, TASK_FINISHED, SUCCESSOR_REGISTERED, MESSAGE_ACK = 1, 2, 4, 8
+# Read satisfied message received from the predecessor, not yet handled
+READ_SATISFIED_PENDING = 16
+ALL_FLAGS = 0b1111
+
+# (name, bit, flags required before the bit can be set)
+ASM_TRANSITIONS = (
+    ("Read satisfied", READ_SATISFIED, READ_SATISFIED_PENDING),
+    ("Task finished", TASK_FINISHED, READ_SATISFIED),
+    ("Successor registered", SUCCESSOR_REGISTERED, 0),
+    ("Message ack", MESSAGE_ACK, READ_SATISFIED | TASK_FINISHED | SUCCESSOR_REGISTERED),
+)
+ASM_ACTIONS = ("Run task", "Send read satisfied", "Delete")
+
+
+def simulate_asm(
+    n_accesses,
+    steps,
+    chain_length=8,
+    probabilities=(1.0, 0.3, 0.2, 0.5),
+    seed=0,
+):
+    """Runs the atomic state machine of ``n_accesses`` DataAccess objects for
+    ``steps`` steps. The accesses form chains of ``chain_length`` accesses to
+    the same address: the first of each chain is read satisfied from the start,
+    the others when their predecessor sends them the read satisfied message.
+
+    The flags of all the accesses are kept in a single uint8 array. At each
+    step, every enabled transition of ``ASM_TRANSITIONS`` fires with its
+    probability, and the actions are found from the bits that changed.
+
+    Returns a dict with the ``occupancy`` of the 16 states at each step, an
+    array of shape (steps + 1, 16), and the number of ``actions`` of each kind
+    run at each step."""
+    rng = np.random.default_rng(seed)
+    flags = np.zeros(n_accesses, dtype=np.uint8)
+    flags[::chain_length] = READ_SATISFIED_PENDING
+    # Accesses that have a successor to send the read satisfied message to
+    has_successor = np.arange(n_accesses) % chain_length != chain_length - 1
+    has_successor[-1] = False
+
+    occupancy = np.zeros((steps + 1, 16), dtype=np.int64)
+    occupancy[0] = np.bincount(flags & ALL_FLAGS, minlength=16)
+    actions = {name: np.zeros(steps, dtype=np.int64) for name in ASM_ACTIONS}
+    for step in range(steps):
+        previous = flags
+        flags = flags.copy()
+        for (_, bit, required), probability in zip(ASM_TRANSITIONS, probabilities):
+            # All the transitions see the flags of the previous step
+            enabled = (previous & bit == 0) & (previous & required == required)
+            flags[enabled & (rng.random(n_accesses) < probability)] |= bit
+
+        run_task = (previous ^ flags) & READ_SATISFIED != 0
+        delete = (previous & ALL_FLAGS != ALL_FLAGS) & (flags & ALL_FLAGS == ALL_FLAGS)
+        done = READ_SATISFIED | TASK_FINISHED | SUCCESSOR_REGISTERED
+        send = (previous & done != done) & (flags & done == done)
+        flags[1:][send[:-1] & has_successor[:-1]] |= READ_SATISFIED_PENDING
+
+        occupancy[step + 1] = np.bincount(flags & ALL_FLAGS, minlength=16)
+        for name, mask in zip(ASM_ACTIONS, (run_task, send, delete)):
+            actions[name][step] = np.count_nonzero(mask)
+    return {"occupancy": occupancy, "actions": actions}
+
+
+def run_locks(args):
+    print(
+        f"{'design':>12} {'threads':>8} {'throughput':>11} {'mean wait':>10} "
+        f"{'max wait':>10} {'delegated':>10} {'events/s':>12}"
+    )
+    for n_threads in args.threads:
+        for design in args.designs:
+            stats = simulate_lock(design, n_threads, args.until, seed=args.seed)[
+                "stats"
+            ]
+            print(
+                f"{design:>12} {n_threads:>8} {stats['throughput']:>11.3f} "
+                f"{stats['mean_wait']:>10.2f} {stats['max_wait']:>10.2f} "
+                f"{stats['delegated']:>10} {stats['events_per_second']:>12.0f}"
+            )
+
+
+def run_asm(args):
+    start = time.perf_counter()
+    result = simulate_asm(
+        args.accesses, args.steps, chain_length=args.chain_length, seed=args.seed
+    )
+    elapsed = time.perf_counter() - start
+
+    occupancy = result["occupancy"]
+    states = np.flatnonzero(occupancy.any(axis=0))
+    print(
+        f"{'step':>6} "
+        + " ".join(f"{state:#06b}".rjust(9) for state in states)
+        + "".join(f" {name:>20}" for name in ASM_ACTIONS)
+    )
+    for step in range(0, args.steps + 1, args.every):
+        actions = result["actions"]
+        print(
+            f"{step:>6} "
+            + " ".join(f"{occupancy[step, state]:>9}" for state in states)
+            + "".join(
+                f" {actions[name][step - 1] if step else 0:>20}" for name in ASM_ACTIONS
+            )
+        )
+    print(
+        f"{args.accesses * args.steps / elapsed:.0f} access transitions/s "
+        f"({elapsed:.2f}s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    lock_parser = subparsers.add_parser(
+        "lock", help="Compare the lock designs of TicketScheduler"
+    )
+    lock_parser.add_argument("--threads", type=int, nargs="+", default=[2, 8, 64])
+    lock_parser.add_argument("--until", type=float, default=1e5, help="Simulated time")
+    lock_parser.add_argument(
+        "--designs", nargs="+", choices=LOCK_DESIGNS, default=LOCK_DESIGNS
+    )
+    lock_parser.add_argument("--seed", type=int, default=0)
+    lock_parser.set_defaults(func=run_locks)
+
+    asm_parser = subparsers.add_parser(
+        "asm", help="Occupancy of the states of the DataAccess flags of ASMStates"
+    )
+    asm_parser.add_argument("--accesses", type=int, default=1_000_000)
+    asm_parser.add_argument("--steps", type=int, default=60)
+    asm_parser.add_argument("--chain-length", type=int, default=8)
+    asm_parser.add_argument(
+        "--every", type=int, default=5, help="Print every this many steps"
+    )
+    asm_parser.add_argument("--seed", type=int, default=0)
+    asm_parser.set_defaults(func=run_asm)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+
+@pytest.fixture
+def render_config(tmp_path):
+    """Small, fast config writing to a temporary media directory."""
+    return {
+        "pixel_height": 90,
+        "pixel_width": 160,
+        "frame_rate": 10,
+        "media_dir": str(tmp_path),
+        "progress_bar": "none",
+        "disable_caching": True,
+    }
+
+
+@pytest.fixture
+def frame_hashes():
+    """Function returning the MD5 of every decoded frame of a video."""
+    from manim.constants import FFMPEG_BIN
+
+    if shutil.which(FFMPEG_BIN) is None:
+        pytest.skip("ffmpeg is not installed")
+
+    def get_frame_hashes(video):
+        output = subprocess.run(
+            [FFMPEG_BIN, "-loglevel", "error", "-i", video, "-f", "framemd5", "-"],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        return [
+            line.split(",")[-1].strip()
+            for line in output.splitlines()
+            if not line.startswith("#")
+        ]
+
+    return get_frame_hashes
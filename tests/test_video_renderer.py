@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("manim")
+
+from manim import *
+
+from video_renderer import SplitRenderer, VideoRenderer
+
+
+class FullFrameRenderer(VideoRenderer):
+    """Draws every frame of the plays a second time from scratch, without the
+    static layers, and records how far the two frames are apart."""
+
+    def __init__(self, **kwargs):
+        VideoRenderer.__init__(self, **kwargs)
+        self.differences = []
+
+    def render(self, scene, time, moving_mobjects, num_frames=1):
+        VideoRenderer.render(self, scene, time, moving_mobjects, num_frames)
+        if self.skip_animations or self.moving_entries is None:
+            return
+        layered = self.get_frame().astype(int)
+        static_image, self.static_image = self.static_image, None
+        CairoRenderer.update_frame(self, scene)
+        self.static_image = static_image
+        self.differences.append(np.abs(layered - self.get_frame().astype(int)).max())
+
+
+class ContainerScene(Scene):
+    """Animates children of a container between static, semi-transparent
+    mobjects, below and above them."""
+
+    def construct(self):
+        moving = Square(side_length=1, color=RED, fill_opacity=1)
+        morphing = Square(side_length=0.5, color=GREEN).shift(2 * LEFT)
+        group = VGroup(
+            Square(side_length=3, color=BLUE, fill_opacity=0.5),
+            moving,
+            morphing,
+            Circle(color=YELLOW, fill_opacity=0.5).shift(RIGHT),
+        )
+        self.add(Rectangle(width=10, height=5, fill_opacity=0.3), group, Dot())
+        self.play(moving.animate.shift(2 * RIGHT))
+        # Transform.begin adds submobjects to ``morphing`` during the play
+        self.play(Transform(morphing, VGroup(Circle(radius=0.2), Dot()).shift(UP)))
+        self.play(group[0].animate.set_opacity(0.2), run_time=0.5)
+
+
+def test_static_layers_match_full_frames(render_config):
+    render_config.update(write_to_movie=False)
+    with tempconfig(render_config):
+        renderer = FullFrameRenderer()
+        ContainerScene(renderer=renderer).render()
+    assert renderer.differences
+    # Only the rounding of the overlay compositing is allowed to differ
+    assert max(renderer.differences) <= 1
+
+
+class WaitScene(Scene):
+    """Static waits around a play, with a semi-transparent mobject."""
+
+    def construct(self):
+        square = Square(color=BLUE, fill_opacity=0.5)
+        self.add(square, Circle(color=RED))
+        self.wait(0.5)
+        self.play(Rotate(square, PI / 4), run_time=0.5)
+        self.wait(1)
+
+
+def render_video(scene_cls, renderer, render_config):
+    with tempconfig(render_config):
+        scene_cls(renderer=renderer).render()
+        return renderer.file_writer.movie_file_path
+
+
+def test_held_waits_match_written_waits(render_config, frame_hashes):
+    written = frame_hashes(
+        render_video(WaitScene, VideoRenderer(hold_frames=False), render_config)
+    )
+    held = frame_hashes(
+        render_video(WaitScene, VideoRenderer(hold_frames=True), render_config)
+    )
+    assert len(written) == 2 * render_config["frame_rate"]
+    assert held == written
+
+
+class ManyPlaysScene(Scene):
+    """Plays and waits of a few frames each, for the chunks of SplitRenderer
+    to start in the middle of the scene."""
+
+    def construct(self):
+        squares = VGroup(*[Square(side_length=0.5) for _ in range(4)])
+        squares.arrange(RIGHT)
+        self.add(squares)
+        for idx, square in enumerate(squares):
+            self.play(square.animate.set_fill(BLUE, opacity=0.5), run_time=0.3)
+            self.play(Rotate(square, PI / 4), run_time=0.4)
+            self.wait(0.2 * (idx + 1))
+        self.play(FadeOut(squares))
+
+
+def test_split_render_matches_serial_render(render_config, frame_hashes):
+    serial = frame_hashes(render_video(ManyPlaysScene, VideoRenderer(), render_config))
+    split = frame_hashes(
+        render_video(
+            ManyPlaysScene, SplitRenderer(processes=3, chunk_frames=4), render_config
+        )
+    )
+    assert serial
+    assert split == serial
+
+
+class UpdaterScene(Scene):
+    """A mobject moved by a time-based updater that isn't linear in dt, so
+    that a play jumped to its end leaves it somewhere else."""
+
+    def construct(self):
+        dot = Dot(3 * LEFT)
+        dot.add_updater(lambda mobj, dt: mobj.shift(min(dt, 0.05) * RIGHT))
+        square = Square(side_length=0.5)
+        self.add(dot, square)
+        for _ in range(3):
+            self.wait(0.4)
+            self.play(Rotate(square, PI / 4), run_time=0.3)
+
+
+def test_split_render_steps_plays_with_updaters(render_config, frame_hashes):
+    serial = frame_hashes(render_video(UpdaterScene, VideoRenderer(), render_config))
+    split = frame_hashes(
+        render_video(
+            UpdaterScene, SplitRenderer(processes=2, chunk_frames=4), render_config
+        )
+    )
+    assert serial
+    assert split == serial
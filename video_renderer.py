@@ -0,0 +1,741 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cairo renderer used by render.py for the scenes of ingi2355_exam_video.py.
+
+Every play/wait of a scene is a segment, written to its own partial movie
+file named after the hash of the whole prefix of the scene: the state of the
+scene and the animations of this play chained with the hash of the previous
+segment. The first segment whose code changed gets a new hash, as does every
+segment after it, while the unchanged prefix is spliced back from the cache
+without being rasterized again.
+
+Scenes made of sections (see ingi2355_exam_video.SectionedScene) are also
+checkpointed: the state of the scene and of the renderer is pickled after
+each section, keyed by the sources the sections up to it depend on. A render
+restores the latest valid checkpoint and only runs the sections after it.
+
+The static mobjects of a play are rasterized once per play, in two layers:
+the ones below the first moving mobject make the background of each frame,
+and the ones above the last moving mobject are composited over the part of
+the frame they cover. Only the mobjects in between are drawn at each frame,
+and both layers are reused by the next plays as long as they don't change.
+
+A static wait is rasterized once, and its single frame is written once to
+ffmpeg, which holds it for the duration of the wait.
+
+In streaming mode, the frames of all the segments of a scene go through a
+single ffmpeg process instead, and the segment boundaries are written next to
+the video as metadata. This saves an encoder start-up and a partial file per
+play, at the cost of the segment cache and of the checkpoints.
+
+In draft mode, only one frame out of ``draft_step`` is interpolated and
+drawn, and repeated for the frames in between, while the decorative
+animations (Circumscribe, Indicate, ...) are replaced by waits of the same
+run time. The video keeps the timing of the final one.
+
+In split mode (SplitRenderer), the plays of a single scene are rendered by
+several processes. The scene is constructed once, every play being skipped,
+and a worker is forked at the start of each chunk of plays to render them,
+from the state of the scene at this point. The plays the parent skips are
+jumped to their end, except the ones with time-based updaters, which are
+stepped at the frame times of a serial render without being drawn, so that
+the updaters get the same dt. Each segment is encoded on its own, as in a
+serial render, so that the joined video is the same.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import subprocess
+import sys
+import time
+import traceback
+
+import numpy as np
+from manim import *
+from manim import __version__ as manim_version
+from manim.utils.hashing import get_hash_from_play_call
+
+import dependencies
+from dependencies import get_dependencies, update_digest
+
+CHECKPOINT_DIR = os.path.join(config.media_dir, "cache", "checkpoints")
+
+# Scene attributes that only make sense during a play, or that can't be pickled
+SCENE_INTERNALS = (
+    "renderer",
+    "queue",
+    "animations",
+    "time_progression",
+    "stop_condition",
+    "moving_mobjects",
+    "static_mobjects",
+)
+RENDERER_STATE = ("segment_hash", "animations_hashes", "num_plays", "time")
+
+# Animations that only draw the eye to mobjects, without changing them
+DECORATIVE_ANIMATIONS = (
+    Circumscribe,
+    Indicate,
+    Flash,
+    FocusOn,
+    Wiggle,
+    ApplyWave,
+    ShowPassingFlash,
+    ShowCreationThenFadeOut,
+    AnimationOnSurroundingRectangle,
+)
+
+
+class SegmentFileWriter(SceneFileWriter):
+    """Writes each segment next to its final path and only moves it there once
+    ffmpeg is done, so that an interrupted render never leaves a truncated
+    segment that would be taken for a cached one."""
+
+    # Number of frames ffmpeg holds the single frame of the segment for,
+    # 0 if the frames of the segment are written one by one
+    held_frames = 0
+
+    def open_movie_pipe(self, file_path=None):
+        if file_path is None:
+            file_path = self.partial_movie_files[self.renderer.num_plays]
+        root, extension = os.path.splitext(file_path)
+        self.segment_file_path = file_path
+        if self.held_frames:
+            self.open_held_movie_pipe(f"{root}.part{extension}")
+        else:
+            SceneFileWriter.open_movie_pipe(self, f"{root}.part{extension}")
+
+    def open_held_movie_pipe(self, file_path):
+        """Same ffmpeg command as SceneFileWriter.open_movie_pipe, so that the
+        segments can still be joined without re-encoding, except that ffmpeg
+        clones the first frame for the rest of the segment."""
+        self.partial_movie_file_path = file_path
+        fps = config["frame_rate"]
+        if fps == int(fps):
+            fps = int(fps)
+        command = [
+            FFMPEG_BIN,
+            "-y",
+            "-f",
+            "rawvideo",
+            "-s",
+            f"{config['pixel_width']}x{config['pixel_height']}",
+            "-pix_fmt",
+            "rgba",
+            "-r",
+            str(fps),
+            "-i",
+            "-",
+            "-an",
+            "-loglevel",
+            config["ffmpeg_loglevel"].lower(),
+            "-metadata",
+            f"comment=Rendered with Manim Community v{manim_version}",
+            "-vf",
+            f"tpad=stop_mode=clone:stop={self.held_frames - 1}",
+        ]
+        if config["transparent"]:
+            command += ["-vcodec", "qtrle"]
+        else:
+            command += ["-vcodec", "libx264", "-pix_fmt", "yuv420p"]
+        command += [file_path]
+        self.writing_process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def close_movie_pipe(self):
+        SceneFileWriter.close_movie_pipe(self)
+        os.replace(self.partial_movie_file_path, self.segment_file_path)
+
+
+class StreamingFileWriter(SegmentFileWriter):
+    """Pipes every segment of the scene to one ffmpeg process writing the
+    final movie file, and records where each segment starts and ends."""
+
+    def __init__(self, renderer, scene_name, **kwargs):
+        SegmentFileWriter.__init__(self, renderer, scene_name, **kwargs)
+        self.segments = []
+        self.num_frames = 0
+
+    def get_segments_path(self):
+        return f"{os.path.splitext(self.movie_file_path)[0]}_segments.json"
+
+    def begin_animation(self, allow_write=False):
+        if not (config["write_to_movie"] and allow_write):
+            return
+        if not hasattr(self, "writing_process"):
+            self.open_movie_pipe(self.movie_file_path)
+        self.segments.append(
+            {
+                "play": self.renderer.num_plays,
+                "hash": self.renderer.animations_hashes[-1],
+                "start_frame": self.num_frames,
+            }
+        )
+
+    def write_frame(self, frame):
+        SegmentFileWriter.write_frame(self, frame)
+        self.num_frames += 1
+
+    def end_animation(self, allow_write=False):
+        if config["write_to_movie"] and allow_write:
+            self.segments[-1]["end_frame"] = self.num_frames
+
+    def finish(self):
+        if not hasattr(self, "writing_process"):
+            raise RuntimeError(f"{self.movie_file_path} : No frame was written")
+        self.close_movie_pipe()
+        with open(self.get_segments_path(), "w") as fp:
+            json.dump(
+                {"frame_rate": config["frame_rate"], "segments": self.segments},
+                fp,
+                indent=2,
+            )
+        logger.info(f"File ready at {self.movie_file_path}")
+
+
+class VideoRenderer(CairoRenderer):
+    def __init__(
+        self,
+        camera_class=None,
+        skip_animations=False,
+        checkpoint=None,
+        streaming=False,
+        hold_frames=True,
+        draft_step=1,
+        **kwargs,
+    ):
+        CairoRenderer.__init__(self, camera_class, skip_animations, **kwargs)
+        # Number of frames each drawn frame stands for
+        self.draft_step = draft_step
+        # Drafts don't share their segments with full renders
+        self.segment_hash = f"draft_{draft_step}" if draft_step > 1 else ""
+        self.first_changed_segment = None
+        # Name of the checkpoint to start from, the latest valid one if None
+        self.checkpoint = checkpoint
+        self.streaming = streaming
+        self.hold_frames = hold_frames
+        self.static_overlay = None
+        # Entries of get_draw_entries drawn at each frame of the current play
+        self.moving_entries = None
+        # Key and pixels of the last background and overlay layers
+        self.static_layers = {}
+
+    def init_scene(self, scene):
+        if self.streaming:
+            self.file_writer = StreamingFileWriter(self, scene.__class__.__name__)
+        else:
+            self.file_writer = SegmentFileWriter(self, scene.__class__.__name__)
+
+    def get_segment_hash(self, scene):
+        play_hash = get_hash_from_play_call(
+            scene, self.camera, scene.animations, scene.mobjects
+        )
+        self.segment_hash = hashlib.sha1(
+            (self.segment_hash + play_hash).encode()
+        ).hexdigest()
+        return self.segment_hash
+
+    def get_moving_roots(self, scene):
+        """Mobjects the current animations, updaters or the foreground can
+        change."""
+        mobjects = [animation.mobject for animation in scene.animations]
+        mobjects += scene.foreground_mobjects
+        mobjects += [
+            mobj for mobj in scene.get_mobject_family_members() if mobj.updaters
+        ]
+        return {id(mobj) for mobj in mobjects}
+
+    def get_draw_entries(self, scene, moving_roots):
+        """Mobjects of the scene in drawing order, as ``(mobject, kind)``
+        pairs, as manim's Scene.get_restructured_mobject_list splits them. A
+        moving mobject is kept whole ("moving"), as the animations can add
+        submobjects to it. Its ancestors are split into their own points
+        ("self") and their children, so that a static mobject is never drawn
+        along with a moving one. Other mobjects are static as a whole
+        ("family")."""
+        has_moving = {}
+
+        def contains_moving(mobj):
+            if id(mobj) not in has_moving:
+                has_moving[id(mobj)] = id(mobj) in moving_roots or any(
+                    contains_moving(submobj) for submobj in mobj.submobjects
+                )
+            return has_moving[id(mobj)]
+
+        entries = []
+        seen = set()
+
+        def add_entries(mobj):
+            if id(mobj) in seen:
+                return
+            seen.add(id(mobj))
+            if id(mobj) in moving_roots:
+                entries.append((mobj, "moving"))
+            elif contains_moving(mobj):
+                entries.append((mobj, "self"))
+                for submobj in mobj.submobjects:
+                    add_entries(submobj)
+            else:
+                entries.append((mobj, "family"))
+
+        for mobj in list_update(scene.mobjects, scene.foreground_mobjects):
+            add_entries(mobj)
+        return entries
+
+    def get_entry_leaves(self, entries):
+        """Mobjects with points to draw for ``entries``, the family of the
+        moving ones being taken as it is at the time of the call."""
+        leaves = []
+        for mobj, kind in entries:
+            if kind == "self":
+                if mobj.has_points():
+                    leaves.append(mobj)
+            else:
+                leaves.extend(mobj.family_members_with_points())
+        return remove_list_redundancies(leaves)
+
+    def get_layer_key(self, mobjects):
+        """Hash of the points and style of ``mobjects``, in order."""
+        digest = hashlib.sha1()
+        for mobj in mobjects:
+            digest.update(f"{id(mobj)}".encode())
+            for key, value in vars(mobj).items():
+                if isinstance(value, np.ndarray):
+                    digest.update(key.encode())
+                    digest.update(value.tobytes())
+                elif isinstance(value, (int, float, str, tuple, type(None))):
+                    digest.update(f"{key}={value!r}".encode())
+        return digest.hexdigest()
+
+    def get_static_layer(self, name, mobjects, rasterize):
+        """Layer ``name`` made of ``mobjects``, reused as long as they don't
+        change."""
+        key = self.get_layer_key(mobjects)
+        if name not in self.static_layers or self.static_layers[name][0] != key:
+            self.static_layers[name] = (key, rasterize(mobjects))
+        return self.static_layers[name][1]
+
+    def rasterize_background(self, mobjects):
+        self.camera.reset()
+        self.camera.capture_mobjects(mobjects, include_submobjects=False)
+        return self.get_frame()
+
+    def rasterize_overlay(self, mobjects):
+        """Pixels of ``mobjects`` over a transparent background, cropped to the
+        part of the frame they cover, with the weight of the frame under them."""
+        self.camera.set_frame_to_background(np.zeros_like(self.camera.pixel_array))
+        self.camera.capture_mobjects(mobjects, include_submobjects=False)
+        overlay = self.get_frame()
+        rows, columns = np.nonzero(overlay[:, :, 3])
+        if not len(rows):
+            return None
+        region = (
+            slice(rows.min(), rows.max() + 1),
+            slice(columns.min(), columns.max() + 1),
+        )
+        # Cairo pixels are premultiplied by alpha
+        overlay = overlay[region].astype(np.uint16)
+        return region, overlay, 255 - overlay[:, :, 3:]
+
+    def save_static_frame_data(self, scene, static_mobjects):
+        """Splits the mobjects of the play in the static background, the
+        mobjects drawn at each frame (from the first to the last moving one,
+        as their order has to be kept) and the static overlay."""
+        self.static_overlay = None
+        self.moving_entries = None
+        # Waits are drawn in one go, and skipped plays are not drawn at all
+        if static_mobjects is None or self.skip_animations:
+            return None
+
+        entries = self.get_draw_entries(scene, self.get_moving_roots(scene))
+        moving = [i for i, (_, kind) in enumerate(entries) if kind == "moving"]
+        if moving:
+            first, last = moving[0], moving[-1] + 1
+        else:
+            first = last = len(entries)
+        if self.camera.use_z_index and any(
+            mobj.z_index for mobj in scene.get_mobject_family_members()
+        ):
+            # The mobjects are drawn in z order, the layers can't be split
+            first, last = 0, len(entries)
+        self.moving_entries = entries[first:last]
+        scene.moving_mobjects = self.get_entry_leaves(self.moving_entries)
+
+        overlay = self.get_entry_leaves(entries[last:])
+        if overlay:
+            self.static_overlay = self.get_static_layer(
+                "overlay", overlay, self.rasterize_overlay
+            )
+        background = self.get_entry_leaves(entries[:first])
+        if not background:
+            return None
+        return self.get_static_layer(
+            "background", background, self.rasterize_background
+        )
+
+    def render(self, scene, time, moving_mobjects, num_frames=1):
+        if self.skip_animations:
+            # Nothing is written, only the time of the frame is accounted
+            self.add_frame(None, num_frames)
+            return
+        if self.moving_entries is None:
+            self.update_frame(scene, moving_mobjects)
+        else:
+            # Taken again at each frame, for the submobjects the animations
+            # add (Transform.begin, DecimalNumber.set_value)
+            self.update_frame(
+                scene,
+                self.get_entry_leaves(self.moving_entries),
+                include_submobjects=False,
+            )
+        if self.static_overlay is not None:
+            self.composite_overlay()
+        self.add_frame(self.get_frame(), num_frames)
+
+    def composite_overlay(self):
+        region, overlay, frame_weight = self.static_overlay
+        frame = self.camera.pixel_array[region]
+        frame[:] = overlay + (frame * frame_weight + 127) // 255
+
+    def get_draft_animations(self, animations):
+        """``animations`` with the decorative ones replaced by a wait, so that
+        the play keeps its run time."""
+        decorative = [
+            animation
+            for animation in animations
+            if isinstance(animation, DECORATIVE_ANIMATIONS)
+        ]
+        if not decorative:
+            return animations
+        kept = [animation for animation in animations if animation not in decorative]
+        return kept + [Wait(max(animation.run_time for animation in decorative))]
+
+    def play_sampled(self, scene):
+        """Like Scene.play_internal, but the animations are only interpolated
+        and drawn every ``draft_step`` frames, each drawn frame being written
+        for the frames up to the next one."""
+        dt = 1 / config["frame_rate"]
+        times = np.arange(0, scene.duration, dt)
+        for start in range(0, len(times), self.draft_step):
+            scene.update_to_time(times[start])
+            num_frames = min(self.draft_step, len(times) - start)
+            self.render(scene, times[start], scene.moving_mobjects, num_frames)
+
+        for animation in scene.animations:
+            animation.finish()
+            animation.clean_up_from_scene(scene)
+        if not self.skip_animations:
+            scene.update_mobjects(0)
+        self.static_image = None
+
+    def get_held_frames(self, scene):
+        """Number of frames of the current play if it is a static wait whose
+        frame can be held by ffmpeg, 0 otherwise."""
+        if (
+            not self.hold_frames
+            or self.streaming
+            or config["format"] == "png"
+            or not scene.is_current_animation_frozen_frame()
+        ):
+            return 0
+        dt = 1 / self.camera.frame_rate
+        return int(scene.duration / dt)
+
+    def hold_current_frame(self, num_frames):
+        """Like freeze_current_frame, but the frame is written only once."""
+        dt = 1 / self.camera.frame_rate
+        self.time += (num_frames - 1) * dt
+        self.add_frame(self.get_frame())
+
+    def get_checkpoint_paths(self, scene):
+        """Path of the checkpoint of each section of ``scene``, named after the
+        hash of the sources of this section and of all the previous ones, of
+        the base classes of the scene and of the renderer itself."""
+        scene_cls = scene.__class__
+        module = sys.modules[scene_cls.__module__]
+        key = (
+            f"{manim_version}_{config.pixel_width}x{config.pixel_height}"
+            f"_{config.frame_rate}"
+        )
+        if self.draft_step > 1:
+            key += f"_draft_{self.draft_step}"
+        digest = hashlib.sha1(key.encode())
+        # The checkpoints hold the renderer state, down to the segment hashes
+        for renderer_module in (sys.modules[__name__], dependencies):
+            digest.update(inspect.getsource(renderer_module).encode())
+        bases = [
+            base for base in scene_cls.__mro__[1:] if base.__module__ == module.__name__
+        ]
+        key = update_digest(
+            digest, module, get_dependencies(module, *bases, cls=scene_cls)
+        ).hexdigest()
+        paths = {}
+        for section in scene.SECTIONS:
+            section_dependencies = get_dependencies(
+                module, getattr(scene_cls, section), cls=scene_cls
+            )
+            key = update_digest(
+                hashlib.sha1(key.encode()), module, section_dependencies
+            ).hexdigest()
+            paths[section] = os.path.join(
+                CHECKPOINT_DIR, scene_cls.__name__, f"{section}_{key}.pickle"
+            )
+        return paths
+
+    def can_checkpoint(self):
+        return (
+            config["write_to_movie"]
+            and not self.streaming
+            and not config["disable_caching"]
+            and not self._original_skipping_status
+        )
+
+    def save_checkpoint(self, scene, section):
+        if not self.can_checkpoint():
+            return
+        state = {
+            "scene": {
+                key: value
+                for key, value in scene.__dict__.items()
+                if key not in SCENE_INTERNALS
+            },
+            "renderer": {key: getattr(self, key) for key in RENDERER_STATE},
+            "partial_movie_files": self.file_writer.partial_movie_files,
+        }
+        try:
+            data = pickle.dumps(state)
+        except (pickle.PicklingError, AttributeError, TypeError) as e:
+            logger.warning(f"Checkpoint {section} not saved: {e}")
+            return
+
+        path = self.get_checkpoint_paths(scene)[section]
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # As for the segments, a killed render never leaves a truncated file
+        with open(f"{path}.part", "wb") as fp:
+            fp.write(data)
+        os.replace(f"{path}.part", path)
+
+    def restore_checkpoint(self, scene):
+        """Restores the latest valid checkpoint of ``scene`` (or the one given
+        to the renderer) and returns the index of the first section to run."""
+        if not self.can_checkpoint():
+            return 0
+        sections = list(scene.SECTIONS)
+        paths = self.get_checkpoint_paths(scene)
+        if self.checkpoint is not None:
+            candidates = [self.checkpoint] if self.checkpoint in paths else []
+        else:
+            candidates = reversed(sections)
+
+        for section in candidates:
+            if not os.path.exists(paths[section]):
+                continue
+            with open(paths[section], "rb") as fp:
+                state = pickle.load(fp)
+            partial_movie_files = state["partial_movie_files"]
+            if not all(map(os.path.exists, filter(None, partial_movie_files))):
+                continue
+
+            scene.__dict__.update(state["scene"])
+            for key, value in state["renderer"].items():
+                setattr(self, key, value)
+            self.file_writer.partial_movie_files = partial_movie_files
+            logger.info(f"{scene} : Starting from checkpoint {section}")
+            return sections.index(section) + 1
+
+        if self.checkpoint is not None:
+            logger.warning(f"{scene} : No valid checkpoint {self.checkpoint}")
+        return 0
+
+    def play(self, scene, *args, **kwargs):
+        self.skip_animations = self._original_skipping_status
+        self.update_skipping_status()
+
+        if self.draft_step > 1:
+            args = self.get_draft_animations(args)
+        scene.compile_animation_data(*args, **kwargs)
+
+        if self.skip_animations:
+            logger.debug(f"Skipping animation {self.num_plays}")
+            hash_current_animation = None
+        elif config["disable_caching"]:
+            hash_current_animation = f"uncached_{self.num_plays:05}"
+        elif self.streaming:
+            # Every segment goes through the encoder, whether cached or not
+            hash_current_animation = self.get_segment_hash(scene)
+        else:
+            hash_current_animation = self.get_segment_hash(scene)
+            if self.file_writer.is_already_cached(hash_current_animation):
+                logger.debug(
+                    f"Animation {self.num_plays} : Using cached segment {hash_current_animation}"
+                )
+                self.skip_animations = True
+            elif self.first_changed_segment is None:
+                self.first_changed_segment = self.num_plays
+                logger.info(
+                    f"Animation {self.num_plays} : First changed segment, "
+                    f"the previous ones are spliced back from the cache"
+                )
+        self.file_writer.add_partial_movie_file(hash_current_animation)
+        self.animations_hashes.append(hash_current_animation)
+        self.render_play(scene)
+        self.num_plays += 1
+
+    def render_play(self, scene):
+        """Runs the compiled play of ``scene``, writing its frames unless it is
+        skipped."""
+        self.static_image = self.save_static_frame_data(scene, scene.static_mobjects)
+
+        self.file_writer.held_frames = self.get_held_frames(scene)
+        self.file_writer.begin_animation(not self.skip_animations)
+        scene.begin_animations()
+        if self.file_writer.held_frames:
+            self.update_frame(scene)
+            self.hold_current_frame(self.file_writer.held_frames)
+        elif scene.is_current_animation_frozen_frame():
+            self.update_frame(scene)
+            self.freeze_current_frame(scene.duration)
+        elif (
+            self.draft_step > 1
+            and not self.skip_animations
+            and scene.stop_condition is None
+        ):
+            self.play_sampled(scene)
+        else:
+            scene.play_internal()
+        self.file_writer.end_animation(not self.skip_animations)
+
+
+class SplitRenderer(VideoRenderer):
+    """Renderer splitting the plays of a scene between ``processes`` forked
+    workers.
+
+    The scene is constructed once, by the parent process, which skips every
+    play. At the first play of each chunk of about ``chunk_frames`` frames to
+    render, it forks a worker that carries on with the construct of the scene,
+    renders the plays of the chunk into their segments, as a serial render
+    would, and exits at the first play of the next chunk. The parent joins the
+    segments once every worker is done.
+
+    A skipped play is jumped to its end, so the parent only reaches the state
+    of a serial render if nothing depends on the frames in between. The plays
+    during which a mobject has a time-based updater are therefore stepped
+    frame by frame (interpolated, not drawn). State that depends on the frames
+    in any other way, e.g. an updater that counts its calls without a dt
+    argument, still differs from a serial render in the chunks after it."""
+
+    def __init__(self, processes, chunk_frames=300, **kwargs):
+        VideoRenderer.__init__(self, **kwargs)
+        self.processes = processes
+        self.chunk_frames = chunk_frames
+        # Index of the first play and number of frames of the current chunk
+        self.chunk_start = None
+        self.chunk_size = 0
+        # Pid -> first play of the chunk of the running workers
+        self.workers = {}
+        self.failed_chunks = []
+        self.is_worker = False
+
+    def get_play_frames(self, scene):
+        return int(np.ceil(scene.duration * config["frame_rate"]))
+
+    def wait_for_workers(self, max_workers):
+        while len(self.workers) > max_workers:
+            for pid, chunk_start in list(self.workers.items()):
+                done, status = os.waitpid(pid, os.WNOHANG)
+                if not done:
+                    continue
+                del self.workers[pid]
+                if status != 0:
+                    self.failed_chunks.append(chunk_start)
+            time.sleep(0.01)
+
+    def start_chunk(self):
+        self.wait_for_workers(self.processes - 1)
+        self.chunk_start = self.num_plays
+        self.chunk_size = 0
+        # Flushed so that the buffered output isn't written by both processes
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            self.is_worker = True
+            self.workers = {}
+        else:
+            self.workers[pid] = self.chunk_start
+            logger.debug(f"Animation {self.num_plays} : Chunk started by {pid}")
+
+    def exit_worker(self, exit_code):
+        sys.stdout.flush()
+        sys.stderr.flush()
+        # The worker must never return into the code that called Scene.render
+        os._exit(exit_code)
+
+    def render_play(self, scene):
+        if not self.skip_animations:
+            if self.chunk_start is None or self.chunk_size >= self.chunk_frames:
+                if self.is_worker:
+                    self.exit_worker(0)
+                self.start_chunk()
+            self.chunk_size += self.get_play_frames(scene)
+            if not self.is_worker:
+                self.skip_animations = True
+                if scene.should_update_mobjects():
+                    self.step_play(scene)
+                    return
+        VideoRenderer.render_play(self, scene)
+
+    def step_play(self, scene):
+        """Runs a play the parent skips at the frame times of a serial render,
+        without drawing it, so that its time-based updaters get the same dt."""
+        self.static_image = self.save_static_frame_data(scene, scene.static_mobjects)
+        self.file_writer.begin_animation(False)
+        scene.begin_animations()
+        if self.draft_step > 1 and scene.stop_condition is None:
+            self.play_sampled(scene)
+        else:
+            # Instance attribute for the duration of the play only
+            scene.get_time_progression = functools.partial(
+                scene.get_time_progression, override_skip_animations=True
+            )
+            try:
+                scene.play_internal()
+            finally:
+                del scene.get_time_progression
+        # Skipped by play_internal when the renderer skips the animations
+        scene.update_mobjects(0)
+        self.file_writer.end_animation(False)
+
+    def update_frame(self, scene, *args, **kwargs):
+        # The parent doesn't draw the frames of the waits it skips either
+        if self.skip_animations and not self.is_worker:
+            return
+        VideoRenderer.update_frame(self, scene, *args, **kwargs)
+
+    def can_checkpoint(self):
+        return not self.is_worker and VideoRenderer.can_checkpoint(self)
+
+    def render_scene(self, scene):
+        """Renders ``scene``, the workers exiting once their chunk is done."""
+        try:
+            scene.render()
+        except BaseException:
+            if self.is_worker:
+                traceback.print_exc()
+                self.exit_worker(1)
+            raise
+
+    def scene_finished(self, scene):
+        if self.is_worker:
+            self.exit_worker(0)
+        self.wait_for_workers(0)
+        if self.failed_chunks:
+            raise RuntimeError(
+                f"{scene} : The chunks starting at the animations "
+                f"{sorted(self.failed_chunks)} failed"
+            )
+        VideoRenderer.scene_finished(self, scene)
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Watch mode for ingi2355_exam_video.py.
+
+The Python modules next to it and the SVG files of ressources/svg are polled
+for changes. On every save, the module is imported again and the key of each
+scene (see render.get_scene_key) is computed from the sources and SVG files
+it reaches through its call graph. Only the scenes whose key changed are
+rendered again, as drafts (see render.py --draft), by a pool of background
+processes. A scene saved again while it is being rendered has its stale job
+cancelled and queued again.
+
+The latest draft of each scene is shown by media/watch/index.html, which
+reloads a video as soon as a new draft of its scene is ready.
+
+    python watch.py --preview
+    python watch.py TicketScheduler SchedulerWaitFree --draft 10
+"""
+
+import argparse
+import glob
+import importlib
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+
+from manim import *
+from manim.utils.file_ops import open_file
+
+from render import (
+    DRAFT_CONFIG,
+    MODULE_NAME,
+    QUALITY_FLAGS,
+    get_available_cores,
+    get_cached_video_path,
+    get_render_config,
+    get_scene_key,
+    get_scenes,
+    render_scene,
+)
+
+WATCH_DIR = os.path.join(config.media_dir, "watch")
+# Modules of the watcher itself, that are not imported again on changes
+WATCHER_MODULES = ("__main__", "render", "dependencies", "video_renderer", "watch")
+
+PREVIEW_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{module} drafts</title>
+<style>
+body {{ background: #111; color: #eee; font-family: sans-serif; }}
+div {{ display: inline-block; margin: 8px; }}
+video {{ width: 480px; }}
+</style>
+</head>
+<body>
+{scenes}
+<script>
+function updatePreview(videos) {{
+  for (const [scene, src] of Object.entries(videos)) {{
+    const video = document.getElementById(scene);
+    if (video && video.getAttribute("src") !== src) {{
+      video.setAttribute("src", src);
+    }}
+  }}
+}}
+// status.js is loaded as a script, which works for file:// pages as well
+setInterval(() => {{
+  const script = document.createElement("script");
+  script.src = "status.js?" + Date.now();
+  script.onload = script.onerror = () => script.remove();
+  document.body.appendChild(script);
+}}, 1000);
+</script>
+</body>
+</html>
+"""
+PREVIEW_SCENE = """<div><h3>{scene}</h3>
+<video id="{scene}" controls autoplay loop muted></video></div>"""
+
+
+def get_watched_files(module_dir, svg_dir):
+    return sorted(
+        glob.glob(os.path.join(module_dir, "*.py"))
+        + glob.glob(os.path.join(svg_dir, "**", "*.svg"), recursive=True)
+    )
+
+
+def get_mtimes(paths):
+    mtimes = {}
+    for path in paths:
+        try:
+            mtimes[path] = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            pass
+    return mtimes
+
+
+def import_module_again(module_dir):
+    """Imports ``MODULE_NAME`` again, along with the modules next to it it
+    imports (the watcher's own modules aside)."""
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if (
+            path
+            and os.path.dirname(os.path.abspath(path)) == module_dir
+            and name not in WATCHER_MODULES
+        ):
+            del sys.modules[name]
+    return importlib.import_module(MODULE_NAME)
+
+
+def render_draft(scene_name, render_config, draft_step, output):
+    video = render_scene(scene_name, render_config, draft_step=draft_step)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    # A cancelled job never leaves a truncated video in the scene cache
+    shutil.copyfile(video, f"{output}.part")
+    os.replace(f"{output}.part", output)
+
+
+class Preview:
+    """media/watch/index.html, showing the latest draft of each scene."""
+
+    def __init__(self, scene_names):
+        self.videos = {}
+        os.makedirs(WATCH_DIR, exist_ok=True)
+        with open(self.get_path("index.html"), "w") as fp:
+            fp.write(
+                PREVIEW_PAGE.format(
+                    module=MODULE_NAME,
+                    scenes="\n".join(
+                        PREVIEW_SCENE.format(scene=scene_name)
+                        for scene_name in scene_names
+                    ),
+                )
+            )
+        self.write_status()
+
+    def get_path(self, file_name):
+        return os.path.join(WATCH_DIR, file_name)
+
+    def write_status(self):
+        with open(self.get_path("status.js.part"), "w") as fp:
+            fp.write(f"updatePreview({json.dumps(self.videos)});\n")
+        os.replace(self.get_path("status.js.part"), self.get_path("status.js"))
+
+    def update(self, scene_name, video):
+        """Shows ``video``, copied under a new name so that the page doesn't
+        play a stale copy from the browser cache."""
+        file_name = os.path.basename(video)
+        if self.videos.get(scene_name) == file_name:
+            return
+        shutil.copyfile(video, self.get_path(file_name))
+        previous = self.videos.get(scene_name)
+        self.videos[scene_name] = file_name
+        self.write_status()
+        if previous is not None:
+            os.remove(self.get_path(previous))
+        logger.info(f"{scene_name} : Preview updated")
+
+    def open(self):
+        open_file(os.path.abspath(self.get_path("index.html")))
+
+
+def watch(scene_names, processes, draft_step, interval, preview):
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    module = importlib.import_module(MODULE_NAME)
+    scene_names = scene_names or [cls.__name__ for cls in get_scenes(module)]
+    svg_dir = os.path.join(module_dir, module.SVG_DIR)
+    render_config = get_render_config(QUALITY_FLAGS["l"])
+    render_config.update(DRAFT_CONFIG)
+
+    page = Preview(scene_names)
+    if preview:
+        page.open()
+
+    mtimes = {}
+    # Key of the draft of each scene, shown or being rendered
+    keys = {}
+    # Scene name -> (process, key) of the running jobs, and key of the queued ones
+    jobs = {}
+    queued = {}
+    logger.info(f"Watching {module_dir} for changes, Ctrl+C to stop")
+    try:
+        while True:
+            current_mtimes = get_mtimes(get_watched_files(module_dir, svg_dir))
+            if current_mtimes != mtimes:
+                mtimes = current_mtimes
+                try:
+                    module = import_module_again(module_dir)
+                    new_keys = {
+                        scene_name: get_scene_key(
+                            module,
+                            getattr(module, scene_name),
+                            render_config,
+                            draft_step,
+                        )
+                        for scene_name in scene_names
+                    }
+                except Exception as e:
+                    # Most likely a file saved in the middle of an edit
+                    logger.error(f"{MODULE_NAME} : {type(e).__name__}: {e}")
+                    new_keys = keys
+
+                for scene_name, key in new_keys.items():
+                    if keys.get(scene_name) == key:
+                        continue
+                    keys[scene_name] = key
+                    if scene_name in jobs:
+                        jobs.pop(scene_name)[0].terminate()
+                        logger.info(f"{scene_name} : Stale render cancelled")
+                    cached_video = get_cached_video_path(scene_name, key)
+                    if os.path.exists(cached_video):
+                        queued.pop(scene_name, None)
+                        page.update(scene_name, cached_video)
+                    else:
+                        queued[scene_name] = key
+
+            for scene_name, (process, key) in list(jobs.items()):
+                if process.exitcode is None:
+                    continue
+                del jobs[scene_name]
+                if process.exitcode == 0:
+                    page.update(scene_name, get_cached_video_path(scene_name, key))
+                else:
+                    logger.error(f"{scene_name} : Render failed")
+
+            while queued and len(jobs) < processes:
+                scene_name = next(iter(queued))
+                key = queued.pop(scene_name)
+                process = multiprocessing.Process(
+                    target=render_draft,
+                    args=(
+                        scene_name,
+                        render_config,
+                        draft_step,
+                        get_cached_video_path(scene_name, key),
+                    ),
+                    daemon=True,
+                )
+                process.start()
+                jobs[scene_name] = (process, key)
+                logger.info(f"{scene_name} : Rendering draft")
+
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        for process, _ in jobs.values():
+            process.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "scenes", nargs="*", help="Scenes to watch (all the scenes by default)"
+    )
+    parser.add_argument(
+        "-j",
+        "--processes",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: available cores)",
+    )
+    parser.add_argument(
+        "--draft",
+        type=int,
+        default=5,
+        metavar="N",
+        help="Draw one frame out of N of the drafts (default: 5)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.5,
+        help="Seconds between two polls of the files (default: 0.5)",
+    )
+    parser.add_argument("--preview", action="store_true", help="Open the preview page")
+    args = parser.parse_args()
+
+    watch(
+        args.scenes,
+        args.processes or get_available_cores(),
+        args.draft,
+        args.interval,
+        args.preview,
+    )
+
+
+if __name__ == "__main__":
+    main()